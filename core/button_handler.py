@@ -1,136 +1,365 @@
 """
-GPIO Button Handler for E-Ink Pet Clock using gpiozero
+GPIO Button Handler for E-Ink Pet Clock
+Uses libgpiod (GPIO character device + epoll), falls back to gpiozero
 Handles button presses with debouncing and event queue
 """
 from typing import Optional
+from collections import deque
+from datetime import timedelta
+import array
+import os
+import select
+import sys
+import threading
 import time
-import queue
 from core.config import Config
+from core.mock_gpio import MockButton
 
-# Try to import gpiozero
-try:
-    from gpiozero import Button as GPIOZeroButton
-    HAS_GPIOZERO = True
-except ImportError:
-    HAS_GPIOZERO = False
+# GPIO libraries are imported on first use by _detect_backend(), so desktop
+# runs with mock buttons never load them
+_backend_detected = False
 
 
-class MockButton:
-    """Mock button for development/testing"""
-    def __init__(self, pin):
-        self.pin = pin
-        self._when_pressed = None
-        self._when_held = None
-        self.hold_time = 2.0
+def _detect_backend():
+    """Import the available GPIO libraries once (libgpiod v2, then gpiozero)"""
+    global _backend_detected, HAS_GPIOD, HAS_GPIOZERO
+    global gpiod, Bias, Direction, Edge, GPIOZeroButton
+    if _backend_detected:
+        return
     
-    @property
-    def when_pressed(self):
-        return self._when_pressed
+    try:
+        import gpiod
+        from gpiod.line import Bias, Direction, Edge
+        HAS_GPIOD = True
+    except ImportError:
+        HAS_GPIOD = False
     
-    @when_pressed.setter
-    def when_pressed(self, func):
-        self._when_pressed = func
+    try:
+        from gpiozero import Button as GPIOZeroButton
+        HAS_GPIOZERO = True
+    except ImportError:
+        HAS_GPIOZERO = False
     
-    @property
-    def when_held(self):
-        return self._when_held
-    
-    @when_held.setter
-    def when_held(self, func):
-        self._when_held = func
-    
-    def close(self):
-        pass
+    _backend_detected = True
+
+
+def __getattr__(name):
+    """Resolve HAS_GPIOD / HAS_GPIOZERO lazily (PEP 562)"""
+    if name in ("HAS_GPIOD", "HAS_GPIOZERO"):
+        _detect_backend()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Button table: (name, BCM pin, has long press)
+# Position in the table is the button id used to index per-button state
+BUTTONS = (
+    ("return", Config.BUTTON_RETURN, False),
+    ("action", Config.BUTTON_ACTION, True),
+    ("go", Config.BUTTON_GO, False),
+)
+BTN_RETURN, BTN_ACTION, BTN_GO = range(len(BUTTONS))
+
+# Event names by button id, interned once so button callbacks never build strings
+PRESS_EVENTS = tuple(sys.intern(f"{name}_press") for name, _, _ in BUTTONS)
+HOLD_EVENTS = tuple(sys.intern(f"{name}_hold") for name, _, _ in BUTTONS)
+RETURN_PRESS, ACTION_PRESS, GO_PRESS = PRESS_EVENTS
+ACTION_HOLD = HOLD_EVENTS[BTN_ACTION]
+
+# Timing thresholds, resolved once so the press path skips Config lookups
+# Comparisons use integer nanoseconds from the monotonic clock
+_DEBOUNCE_S = Config.BUTTON_DEBOUNCE_MS / 1000.0
+_LONG_PRESS_S = Config.BUTTON_LONG_PRESS_MS / 1000.0
+_DEBOUNCE_NS = Config.BUTTON_DEBOUNCE_MS * 1_000_000
+_LONG_PRESS_NS = Config.BUTTON_LONG_PRESS_MS * 1_000_000
+
+# Edge events read from the line request per syscall
+_MAX_EDGE_EVENTS = 16
+
+# SCHED_FIFO priority of the libgpiod reader thread
+_READER_PRIORITY = 20
 
 
 class ButtonHandler:
-    """Handles button inputs using gpiozero library with event queue"""
+    """Handles button inputs using libgpiod (or gpiozero) with event queue"""
+    __slots__ = (
+        "_events", "_wake", "_sink", "_starts", "_buttons",
+        "_line_request", "_route", "_epoll", "_wake_fds", "_reader", "_running",
+    )
     
     def __init__(self):
-        # Event queue with maxsize=1: only keeps the most recent event
+        # Event channel with maxlen=1: only keeps the most recent event
         # This acts as a natural debouncer - new presses overwrite pending ones
-        self.event_queue = queue.Queue(maxsize=1)
+        # append/popleft are atomic, the Event only wakes a blocking get_event()
+        self._events = deque(maxlen=1)
+        self._wake = threading.Event()
+        
+        # Optional consumer callback that takes events instead of the channel
+        self._sink = None
+        
+        # Press start per button id from the kernel timestamp, ns (libgpiod only)
+        self._starts = array.array('q', [0] * len(BUTTONS))
+        
+        # gpiozero (or mock) buttons, indexed by button id
+        self._buttons = []
         
-        # Last button press time for additional debouncing
-        self._last_button_time = {}
-        self._debounce_seconds = 0.2  # 200ms software debounce
+        # libgpiod state (only used when the character device is available)
+        self._line_request = None
+        self._route = ()
+        self._epoll = None
+        self._wake_fds = None
+        self._reader = None
+        self._running = False
         
         self._setup_buttons()
     
-    def _queue_event(self, button_name: str):
-        """Queue a button event (non-blocking, instant return)"""
-        # Software debounce check
-        now = time.time()
-        last_time = self._last_button_time.get(button_name, 0)
-        
-        if now - last_time < self._debounce_seconds:
-            # Too soon after last press of this button, ignore
+    def _put_event(self, button_name: str):
+        """Put an event in the channel (non-blocking, instant return)"""
+        sink = self._sink
+        if sink is not None:
+            sink(button_name)
             return
         
-        self._last_button_time[button_name] = now
+        # A pending event is replaced - the latest press wins
+        self._events.append(button_name)
+        self._wake.set()
+    
+    def set_sink(self, sink):
+        """Deliver events to sink(event_name) instead of get_event()
         
-        # Try to put event in queue
-        # If queue is full (already has an event), this will fail silently
-        # which is what we want - the pending event is still valid
-        try:
-            self.event_queue.put_nowait(button_name)
-        except queue.Full:
-            # Queue already has an event, that's fine
-            # The user will process that one first
-            if Config.DEBUG_MODE:
-                print(f"⚠ Event queue full, {button_name} press will be processed next")
-    
-    def get_event(self, timeout: float = 0) -> Optional[str]:
+        Lets a consumer that already waits on its own queue receive button
+        events there, without a thread blocking in get_event(). The sink is
+        called from the GPIO thread and must not block.
         """
-        Get the next button event from queue (non-blocking by default)
+        self._sink = sink
+    
+    def _make_queuer(self, button_name: str):
+        """Build a gpiozero callback that queues a fixed event name
+        
+        Each callback debounces against its own last-press cell, so the
+        press path does no per-button lookups.
+        """
+        put_event = self._put_event
+        last = [0]
+        
+        def queuer():
+            now = time.monotonic_ns()
+            if now - last[0] < _DEBOUNCE_NS:
+                # Too soon after last press of this button, ignore
+                return
+            last[0] = now
+            put_event(button_name)
+        
+        return queuer
+    
+    def _dispatch(self, button_id: int):
+        """Queue the press event for a button from a libgpiod edge
+        
+        Edges from libgpiod are already debounced in-kernel via the line
+        request's debounce period, so no software debounce is applied.
+        """
+        self._put_event(PRESS_EVENTS[button_id])
+    
+    def get_event(self, timeout: Optional[float] = 0) -> Optional[str]:
+        """
+        Get the next button event (non-blocking by default)
         
         Args:
-            timeout: Seconds to wait for event (0 = non-blocking)
+            timeout: Seconds to wait for event (0 = non-blocking, None = forever)
             
         Returns:
             Button name string or None if no event
         """
+        if (timeout is None or timeout > 0) and not self._events:
+            self._wake.wait(timeout)
+        
+        # Clear before popping so a press landing in between re-arms the wake
+        self._wake.clear()
         try:
-            return self.event_queue.get(block=(timeout > 0), timeout=timeout if timeout > 0 else None)
-        except queue.Empty:
+            return self._events.popleft()
+        except IndexError:
             return None
     
     def has_event(self) -> bool:
         """Check if there's a pending button event"""
-        return not self.event_queue.empty()
+        return bool(self._events)
     
     def _setup_buttons(self):
-        """Initialize GPIO buttons with gpiozero"""
+        """Initialize GPIO buttons (libgpiod, then gpiozero, then mock)"""
+        _detect_backend()
+        if HAS_GPIOD and self._setup_gpiod():
+            return
+        
         if HAS_GPIOZERO:
-            debounce_sec = Config.BUTTON_DEBOUNCE_MS / 1000.0
-            hold_time_sec = Config.BUTTON_LONG_PRESS_MS / 1000.0
-            
-            self.button_return = GPIOZeroButton(Config.BUTTON_RETURN, pull_up=True, bounce_time=debounce_sec, hold_time=hold_time_sec)
-            self.button_action = GPIOZeroButton(Config.BUTTON_ACTION, pull_up=True, bounce_time=debounce_sec, hold_time=hold_time_sec)
-            self.button_go = GPIOZeroButton(Config.BUTTON_GO, pull_up=True, bounce_time=debounce_sec, hold_time=hold_time_sec)
-            
-            # Set up callbacks to queue events (instant, non-blocking)
-            self.button_return.when_pressed = lambda: self._queue_event("return_press")
-            self.button_action.when_pressed = lambda: self._queue_event("action_press")
-            self.button_action.when_held = lambda: self._queue_event("action_hold")
-            self.button_go.when_pressed = lambda: self._queue_event("go_press")
+            for button_id, (name, pin, has_hold) in enumerate(BUTTONS):
+                button = GPIOZeroButton(pin, pull_up=True, bounce_time=_DEBOUNCE_S, hold_time=_LONG_PRESS_S)
+                
+                # Set up callbacks to queue events (instant, non-blocking)
+                button.when_pressed = self._make_queuer(PRESS_EVENTS[button_id])
+                if has_hold:
+                    button.when_held = self._make_queuer(HOLD_EVENTS[button_id])
+                self._buttons.append(button)
             
             print("✓ GPIO buttons initialized with gpiozero (event queue mode)")
-            print(f"  RETURN: GPIO {Config.BUTTON_RETURN}")
-            print(f"  ACTION: GPIO {Config.BUTTON_ACTION}")
-            print(f"  GO:     GPIO {Config.BUTTON_GO}")
+            self._print_pins()
         else:
             print("⚠ Using mock buttons")
-            self.button_return = MockButton(Config.BUTTON_RETURN)
-            self.button_action = MockButton(Config.BUTTON_ACTION)
-            self.button_go = MockButton(Config.BUTTON_GO)
+            self._buttons = [MockButton(pin) for _, pin, _ in BUTTONS]
+    
+    def _print_pins(self):
+        """Print the pin assigned to each button"""
+        for name, pin, _ in BUTTONS:
+            print(f"  {name.upper() + ':':8s}GPIO {pin}")
+    
+    def _setup_gpiod(self) -> bool:
+        """Request button lines from the GPIO character device
+        
+        Falling edges are armed on all three pins (rising too on ACTION, for
+        long press) and serviced by a single epoll wait in a daemon thread,
+        so no CPU is used between presses.
+        
+        Returns:
+            True if the lines were requested, False to fall back
+        """
+        debounce = timedelta(milliseconds=Config.BUTTON_DEBOUNCE_MS)
+        press_settings = gpiod.LineSettings(
+            direction=Direction.INPUT,
+            bias=Bias.PULL_UP,
+            edge_detection=Edge.FALLING,
+            debounce_period=debounce,
+        )
+        hold_settings = gpiod.LineSettings(
+            direction=Direction.INPUT,
+            bias=Bias.PULL_UP,
+            edge_detection=Edge.BOTH,
+            debounce_period=debounce,
+        )
+        
+        press_pins = tuple(pin for _, pin, has_hold in BUTTONS if not has_hold)
+        hold_pins = tuple(pin for _, pin, has_hold in BUTTONS if has_hold)
+        
+        try:
+            self._line_request = gpiod.request_lines(
+                Config.GPIO_CHIP,
+                consumer="eink-pet-clock",
+                config={press_pins: press_settings, hold_pins: hold_settings},
+            )
+        except OSError as e:
+            print(f"⚠ Could not request lines from {Config.GPIO_CHIP}: {e}")
+            return False
+        
+        # Line offset (BCM pin) -> button id, a fixed tuple indexed by offset
+        # so the reader thread does no hashing per edge
+        route = [None] * (max(pin for _, pin, _ in BUTTONS) + 1)
+        for button_id, (_, pin, _) in enumerate(BUTTONS):
+            route[pin] = button_id
+        self._route = tuple(route)
+        
+        # Pipe lets cleanup() wake the reader thread out of epoll.poll()
+        self._wake_fds = os.pipe()
+        self._epoll = select.epoll()
+        self._epoll.register(self._line_request.fd, select.EPOLLIN)
+        self._epoll.register(self._wake_fds[0], select.EPOLLIN)
+        
+        self._running = True
+        self._reader = threading.Thread(target=self._read_edge_events, name="gpiod-buttons", daemon=True)
+        self._reader.start()
+        
+        print(f"✓ GPIO buttons initialized with libgpiod ({Config.GPIO_CHIP}, event queue mode)")
+        self._print_pins()
+        return True
+    
+    def _read_edge_events(self):
+        """Reader thread: block in epoll and drain all queued edges per wakeup"""
+        self._raise_priority()
+        wake_fd = self._wake_fds[0]
+        request = self._line_request
+        
+        while self._running:
+            for fd, _ in self._epoll.poll():
+                if fd == wake_fd:
+                    return
+                
+                # One wakeup can expose several edges under rapid presses,
+                # read them in batches until the kernel buffer is empty
+                events = request.read_edge_events(max_events=_MAX_EDGE_EVENTS)
+                while len(events) == _MAX_EDGE_EVENTS and request.wait_edge_events(0):
+                    events += request.read_edge_events(max_events=_MAX_EDGE_EVENTS)
+                self._handle_edges(events)
+    
+    def _raise_priority(self):
+        """Run the calling reader thread as SCHED_FIFO, pinned to the last core
+        
+        Keeps press latency steady while the display refresh loads the CPU.
+        Needs root or CAP_SYS_NICE, otherwise the default scheduling is kept.
+        """
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(_READER_PRIORITY))
+        except PermissionError:
+            print("⚠ No permission for real-time button thread priority")
+            return
+        
+        cpus = os.sched_getaffinity(0)
+        if len(cpus) > 1:
+            os.sched_setaffinity(0, {max(cpus)})
+    
+    def _handle_edges(self, events):
+        """Coalesce a batch of edge events and queue the resulting presses
+        
+        Repeated edges of the same kind on one line (bounces that got past
+        the kernel debounce) collapse into one, keeping the last timestamp.
+        """
+        falling = gpiod.EdgeEvent.Type.FALLING_EDGE
+        edges = []  # [button_id, is_press, timestamp_ns] in arrival order
+        last = {}   # button id -> its latest entry in edges
+        
+        for event in events:
+            button_id = self._route[event.line_offset]
+            is_press = event.event_type == falling
+            edge = last.get(button_id)
+            if edge is not None and edge[1] == is_press:
+                edge[2] = event.timestamp_ns
+                continue
+            edge = [button_id, is_press, event.timestamp_ns]
+            edges.append(edge)
+            last[button_id] = edge
+        
+        for button_id, is_press, timestamp_ns in edges:
+            if is_press:
+                self._starts[button_id] = timestamp_ns
+                self._dispatch(button_id)
+            else:
+                self._release(button_id, timestamp_ns)
+    
+    def _release(self, button_id: int, timestamp_ns: int):
+        """Queue the hold event if the press lasted at least the long-press time
+        
+        Hold duration is the difference between the kernel timestamps of the
+        falling (press) and rising (release) edges, so no polling is needed.
+        """
+        start = self._starts[button_id]
+        self._starts[button_id] = 0
+        if start and timestamp_ns - start >= _LONG_PRESS_NS:
+            self._put_event(HOLD_EVENTS[button_id])
     
     def cleanup(self):
-        if HAS_GPIOZERO:
+        if self._line_request is not None:
+            self._running = False
+            os.write(self._wake_fds[1], b"\0")
+            self._reader.join(timeout=1.0)
+            try:
+                self._epoll.close()
+                os.close(self._wake_fds[0])
+                os.close(self._wake_fds[1])
+                self._line_request.release()
+                print("GPIO lines released")
+            except Exception as e:
+                print(f"Warning: Error releasing GPIO lines: {e}")
+            self._line_request = None
+        elif HAS_GPIOZERO:
             try:
-                self.button_return.close()
-                self.button_action.close()
-                self.button_go.close()
+                for button in self._buttons:
+                    button.close()
                 print("GPIO buttons cleaned up")
             except Exception as e:
                 print(f"Warning: Error cleaning up buttons: {e}")
@@ -144,3 +373,21 @@ def get_button_handler() -> ButtonHandler:
     if _button_handler is None:
         _button_handler = ButtonHandler()
     return _button_handler
+
+
+if __name__ == "__main__":
+    # Test button handler: block until each press, no polling loop
+    buttons = get_button_handler()
+    print("Press buttons (Ctrl+C to exit)")
+    
+    try:
+        while True:
+            event = buttons.get_event(timeout=None)
+            if event == ACTION_HOLD:
+                print("ACTION long press detected!")
+            elif event is not None:
+                print(f"Button event: {event}")
+    except KeyboardInterrupt:
+        print("\nExiting")
+    finally:
+        buttons.cleanup()
@@ -5,19 +5,47 @@ Loads settings from .env file and provides defaults
 import os
 from pathlib import Path
 from typing import Optional
-from dotenv import load_dotenv
+
+# Settings compiled from .env by scripts/compile_config.py, if present
+try:
+    from core import config_compiled as _compiled
+except ImportError:
+    _compiled = None
 
 # Load .env file from project root
 PROJECT_ROOT = Path(__file__).parent.parent
 ENV_PATH = PROJECT_ROOT / ".env"
+_ENV_FILE = str(ENV_PATH)
 
-if ENV_PATH.exists():
-    load_dotenv(ENV_PATH)
+# EINK_ENV_LOADED marks an environment that is already populated (set by a
+# parent process or a service unit), so .env is only parsed once
+if _compiled is not None or os.environ.get("EINK_ENV_LOADED"):
+    pass
+elif os.path.isfile(_ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+    os.environ["EINK_ENV_LOADED"] = "1"
 else:
     print(f"Warning: .env file not found at {ENV_PATH}")
     print("Using default configuration. Copy .env.example to .env to configure.")
 
 
+def _getenv(key: str, default: str) -> str:
+    """Get a setting from the compiled config, falling back to the environment"""
+    if _compiled is not None and hasattr(_compiled, key):
+        return getattr(_compiled, key)
+    return os.getenv(key, default)
+
+
+def _getenv_int(key: str, default: int) -> int:
+    """Get an integer setting, keeping the default if unset or not a number"""
+    if _compiled is not None and hasattr(_compiled, key):
+        value = getattr(_compiled, key)
+    else:
+        value = os.environ.get(key)
+    return int(value) if value and value.isdigit() else default
+
+
 class Config:
     """Application configuration"""
     
@@ -27,26 +55,30 @@ class Config:
     ASSETS_DIR = PROJECT_ROOT / "assets"
     SPRITES_DIR = ASSETS_DIR / "sprites"
     FONTS_DIR = ASSETS_DIR / "fonts"
+    FONT_TTC = str(FONTS_DIR / "Font.ttc")  # Joined once, used for every font size
     
     # Device Identity
-    DEVICE_NAME: str = os.getenv("DEVICE_NAME", "bunny_clock")
-    DEVICE_TIMEZONE: str = os.getenv("DEVICE_TIMEZONE", "America/Mexico_City")
+    DEVICE_NAME: str = _getenv("DEVICE_NAME", "bunny_clock")
+    DEVICE_TIMEZONE: str = _getenv("DEVICE_TIMEZONE", "America/Mexico_City")
     
     # Network Configuration
-    DEVICE_IP: str = os.getenv("DEVICE_IP", "10.8.17.62")
-    REMOTE_DEVICE_IP: str = os.getenv("REMOTE_DEVICE_IP", "10.8.17.114")
-    API_PORT: int = int(os.getenv("API_PORT", "5000"))
+    DEVICE_IP: str = _getenv("DEVICE_IP", "10.8.17.62")
+    REMOTE_DEVICE_IP: str = _getenv("REMOTE_DEVICE_IP", "10.8.17.114")
+    API_PORT: int = _getenv_int("API_PORT", 5000)
     
     # Display Settings
-    TIME_FORMAT: int = int(os.getenv("TIME_FORMAT", "24"))
+    TIME_FORMAT: int = _getenv_int("TIME_FORMAT", 24)
     DISPLAY_WIDTH: int = 250  # Waveshare 2.13" V4
     DISPLAY_HEIGHT: int = 122
+    PARTIAL_WINDOW: bool = _getenv("PARTIAL_WINDOW", "false").lower() == "true"  # Send only changed rows on partial refresh
+    PARTIAL_ERASURE_LIMIT: int = _getenv_int("PARTIAL_ERASURE_LIMIT", 150000)  # Changed pixels before a forced full refresh
     
     # Pet Settings
-    PET_TYPE: str = os.getenv("PET_TYPE", "bunny")
-    PET_NAME: str = os.getenv("PET_NAME", "Fluffy")
+    PET_TYPE: str = _getenv("PET_TYPE", "bunny")
+    PET_NAME: str = _getenv("PET_NAME", "Fluffy")
     
     # GPIO Pin Configuration
+    GPIO_CHIP: str = _getenv("GPIO_CHIP", "/dev/gpiochip0")  # gpiochip4 on Pi 5
     BUTTON_RETURN: int = 6   # Pin 31
     BUTTON_ACTION: int = 13  # Pin 33
     BUTTON_GO: int = 19      # Pin 35
@@ -58,6 +90,11 @@ class Config:
     PET_UPDATE_INTERVAL: int = 3600  # Update pet state every hour
     FULL_REFRESH_CYCLES: int = 10    # Full refresh every N updates
     
+    # Idle backoff: the sprite animation slows down while nobody touches the device
+    IDLE_SLEEP_MIN: float = 0.5   # Animation interval while in use
+    IDLE_SLEEP_MAX: float = 2.0   # Slowest animation interval when idle
+    MAX_IDLE_CYCLES: int = 100    # Loop wakeups without input before backing off
+    
     # Pet Mechanics
     HUNGER_DECAY_RATE: float = 1.0  # Points per hour
     HAPPINESS_DECAY_RATE: float = 0.5  # Points per hour
@@ -66,8 +103,8 @@ class Config:
     MAX_HEALTH: int = 10
     
     # Development/Testing
-    DEBUG_MODE: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
-    MOCK_HARDWARE: bool = os.getenv("MOCK_HARDWARE", "false").lower() == "true"
+    DEBUG_MODE: bool = _getenv("DEBUG_MODE", "false").lower() == "true"
+    MOCK_HARDWARE: bool = _getenv("MOCK_HARDWARE", "false").lower() == "true"
     
     @classmethod
     def get_remote_url(cls, endpoint: str = "") -> str:
@@ -77,10 +114,16 @@ class Config:
     @classmethod
     def ensure_directories(cls):
         """Create necessary directories if they don't exist"""
+        # After the first run a single stat replaces the four mkdir calls
+        sentinel = cls.DATA_DIR / ".initialized"
+        if sentinel.exists():
+            return
+        
         cls.DATA_DIR.mkdir(exist_ok=True)
         cls.ASSETS_DIR.mkdir(exist_ok=True)
         cls.SPRITES_DIR.mkdir(exist_ok=True)
         cls.FONTS_DIR.mkdir(exist_ok=True)
+        sentinel.touch()
     
     @classmethod
     def to_dict(cls) -> dict:
@@ -99,6 +142,17 @@ class Config:
         }
 
 
+# Hot-path settings as plain module constants (one global lookup instead
+# of module -> class -> attribute in the display loop)
+DEBUG_MODE = Config.DEBUG_MODE
+FULL_REFRESH_CYCLES = Config.FULL_REFRESH_CYCLES
+CLOCK_UPDATE_INTERVAL = Config.CLOCK_UPDATE_INTERVAL
+PET_UPDATE_INTERVAL = Config.PET_UPDATE_INTERVAL
+IDLE_SLEEP_MIN = Config.IDLE_SLEEP_MIN
+IDLE_SLEEP_MAX = Config.IDLE_SLEEP_MAX
+MAX_IDLE_CYCLES = Config.MAX_IDLE_CYCLES
+
+
 # Initialize directories on import
 Config.ensure_directories()
 
@@ -3,9 +3,10 @@ E-Ink Display Manager for Waveshare 2.13" V4
 Provides abstraction layer with partial refresh support
 """
 from PIL import Image, ImageDraw, ImageFont
-from typing import Optional, Tuple
+import zlib
+from typing import Iterable, Optional, Tuple
 from pathlib import Path
-from core.config import Config
+from core.config import Config, DEBUG_MODE, FULL_REFRESH_CYCLES
 
 # Try to import Waveshare EPD library
 try:
@@ -15,6 +16,23 @@ except ImportError:
     HAS_EPD = False
     print("Warning: waveshare_epd not available. Using mock display.")
 
+# Max cached text widths before the cache is reset (clock strings, labels)
+TEXT_WIDTH_CACHE_SIZE = 512
+
+# Clock font size and the characters pre-rendered for it (24h and 12h formats)
+CLOCK_FONT = 'huge'
+CLOCK_CHARS = "0123456789: AMP"
+
+# Pixels changed by partial refreshes before a full refresh is forced to
+# clear the ghosting they leave behind
+PARTIAL_ERASURE_LIMIT = Config.PARTIAL_ERASURE_LIMIT
+
+# Controller command that writes the black/white RAM (SSD1680)
+_WRITE_RAM_BW = 0x24
+
+# Dirty-column marker meaning the whole frame must be re-packed
+_ALL_DIRTY = (0, 1 << 30)
+
 
 class MockEPD:
     """Mock e-ink display for development"""
@@ -54,41 +72,78 @@ class DisplayManager:
         else:
             self.epd = MockEPD()
         
+        # Refresh functions resolved once (the mock only has display_fast)
+        self._display_full = self.epd.display
+        self._display_fast = self.epd.display_fast
+        if HAS_EPD:
+            self._display_partial = self.epd.displayPartial
+            self._display_base = self.epd.displayPartBaseImage
+        else:
+            self._display_partial = self._display_base = self.epd.display_fast
+        
+        # Windowed partial refresh (opt-in): write only the changed rows to the
+        # controller RAM. It relies on the registers set up by the driver's
+        # displayPartial(), so it is used only after one has run since the last
+        # full refresh (_window_ready).
+        self._windowed = HAS_EPD and Config.PARTIAL_WINDOW and all(
+            hasattr(self.epd, name)
+            for name in ("SetWindow", "SetCursor", "send_command", "send_data2", "TurnOnDisplayPart")
+        )
+        self._window_ready = False
+        
         # Display dimensions (rotated for landscape)
         self.width = self.epd.height  # 250
         self.height = self.epd.width  # 122
         
-        # Current image buffer
-        self.image: Optional[Image.Image] = None
-        self.draw: Optional[ImageDraw.Draw] = None
+        # Canvas (1-bit, white background), allocated once and cleared per frame
+        self.image: Optional[Image.Image] = Image.new('1', (self.width, self.height), 255)
+        self.draw: Optional[ImageDraw.Draw] = ImageDraw.Draw(self.image)
+        
+        # Packed EPD frame buffer of self.image and the landscape columns
+        # (x0, x1) drawn since it was packed, None when up to date
+        self._buffer: Optional[bytearray] = None
+        self._dirty: Optional[Tuple[int, int]] = _ALL_DIRTY
+        
+        # CRC of the last buffer sent to the panel, to skip identical frames
+        self._last_digest: Optional[int] = None
         
         # Refresh tracking
         self.update_count = 0
         self.last_full_refresh = 0
         self.base_image_set = False  # Track if base image is set for partial updates
+        self.partial_erasure = 0  # Pixels changed since the last full refresh
         
         # Fonts
         self.fonts = {}
         self._load_fonts()
         
+        # Rendered text bbox by (text, font size), measured once per string
+        # on a scratch 1-bit canvas so metrics match the real one
+        self._text_bboxes = {}
+        self._measure = ImageDraw.Draw(Image.new('1', (1, 1)))
+        
+        # Clock glyphs rasterized once: char -> (1-bit ink mask, advance)
+        self._clock_glyphs = self._render_glyphs(CLOCK_FONT, CLOCK_CHARS)
+        
         self.initialized = False
     
     def _load_fonts(self):
         """Load fonts for rendering"""
         # Try to load custom fonts, fall back to default
-        font_dir = Config.FONTS_DIR
+        font_path = Config.FONT_TTC
         
         try:
-            # Load different sizes
+            # Load the font file once, other sizes are variants of it
+            base = ImageFont.truetype(font_path, 12)
             self.fonts = {
-                'small': ImageFont.truetype(str(font_dir / "Font.ttc"), 12),
-                'medium': ImageFont.truetype(str(font_dir / "Font.ttc"), 16),
-                'large': ImageFont.truetype(str(font_dir / "Font.ttc"), 24),
-                'xlarge': ImageFont.truetype(str(font_dir / "Font.ttc"), 32),
-                'huge': ImageFont.truetype(str(font_dir / "Font.ttc"), 48),  # Big clock digits
-                'giant': ImageFont.truetype(str(font_dir / "Font.ttc"), 64),  # Massive (may be too big)
+                'small': base,
+                'medium': base.font_variant(size=16),
+                'large': base.font_variant(size=24),
+                'xlarge': base.font_variant(size=32),
+                'huge': base.font_variant(size=48),  # Big clock digits
+                'giant': base.font_variant(size=64),  # Massive (may be too big)
             }
-        except:
+        except (OSError, ValueError):
             # Fall back to default font
             print("Warning: Could not load custom fonts, using default")
             default_font = ImageFont.load_default()
@@ -101,6 +156,17 @@ class DisplayManager:
                 'giant': default_font,
             }
     
+    def _render_glyphs(self, font_size: str, chars: str) -> dict:
+        """Rasterize single characters to 1-bit masks for fast pasting"""
+        font = self.get_font(font_size)
+        glyphs = {}
+        for char in chars:
+            bbox = font.getbbox(char)
+            mask = Image.new('1', (max(bbox[2], 1), max(bbox[3], 1)), 0)
+            ImageDraw.Draw(mask).text((0, 0), char, font=font, fill=1)
+            glyphs[char] = (mask, font.getlength(char))
+        return glyphs
+    
     def init(self):
         """Initialize the display"""
         if not self.initialized:
@@ -115,13 +181,65 @@ class DisplayManager:
             self.epd.init_fast()
         self.initialized = True
     
-    def create_canvas(self) -> Tuple[Image.Image, ImageDraw.Draw]:
-        """Create a new drawing canvas"""
-        # Create image (1-bit, white background)
-        self.image = Image.new('1', (self.width, self.height), 255)
-        self.draw = ImageDraw.Draw(self.image)
+    def get_canvas(self, clear: bool = True) -> Tuple[Image.Image, ImageDraw.Draw]:
+        """Get the persistent drawing canvas, filled white in place if clear"""
+        if clear:
+            self.image.paste(255, (0, 0, self.width, self.height))
+            self._dirty = _ALL_DIRTY
         return self.image, self.draw
     
+    def create_canvas(self) -> Tuple[Image.Image, ImageDraw.Draw]:
+        """Clear the drawing canvas and return it"""
+        return self.get_canvas(clear=True)
+    
+    def mark_dirty(self, x0: int, x1: int):
+        """Record that landscape columns x0..x1 (exclusive) were drawn on
+        
+        Code drawing on self.image / self.draw directly must call this so
+        the next get_buffer() re-packs those columns.
+        """
+        dirty = self._dirty
+        if dirty is not None:
+            x0 = min(x0, dirty[0])
+            x1 = max(x1, dirty[1])
+        self._dirty = (x0, x1)
+    
+    def get_buffer(self):
+        """Get the packed EPD buffer for the current image
+        
+        Packs the same layout as the Waveshare driver's getbuffer() (image
+        rotated by 90 degrees, 1 bit per pixel, MSB first, 1 = white) with
+        PIL's C packer, without its per-call conversion and copies. Each
+        landscape column is one contiguous row of the buffer, so only the
+        rows for dirty columns are re-packed and spliced into the last buffer.
+        Pixels that differ from the last buffer are added to partial_erasure.
+        """
+        dirty = self._dirty
+        if dirty is None and self._buffer is not None:
+            return self._buffer
+        
+        x0 = max(dirty[0], 0) if dirty else 0
+        x1 = min(dirty[1], self.width) if dirty else self.width
+        
+        if self._buffer is None:
+            self._buffer = bytearray(self.image.rotate(90, expand=True).tobytes())
+        elif x0 < x1:
+            if x0 == 0 and x1 == self.width:
+                start, data = 0, self.image.rotate(90, expand=True).tobytes()
+            else:
+                strip = self.image.crop((x0, 0, x1, self.height)).rotate(90, expand=True)
+                start, data = (self.width - x1) * ((self.height + 7) // 8), strip.tobytes()
+            end = start + len(data)
+            
+            # Count changed pixels, then overwrite the existing buffer in place
+            changed = int.from_bytes(self._buffer[start:end], "big") ^ int.from_bytes(data, "big")
+            if changed:
+                self.partial_erasure += bin(changed).count("1")
+            self._buffer[start:end] = data
+        
+        self._dirty = None
+        return self._buffer
+    
     def display(self, use_partial: bool = True, partial_mode: str = "fast"):
         """
         Display the current image buffer
@@ -134,57 +252,105 @@ class DisplayManager:
             print("Warning: No image to display")
             return
         
+        # Skip partial refreshes that would not change the panel
+        # (full refreshes always run, they clear ghosting)
+        buffer = self.get_buffer()
+        digest = zlib.crc32(buffer)
+        if use_partial and digest == self._last_digest and (partial_mode != "true" or self.base_image_set):
+            if DEBUG_MODE:
+                print("Display update skipped (frame unchanged)")
+            return
+        self._last_digest = digest
+        
         self.update_count += 1
         
         # Decide refresh strategy
-        force_full = (self.update_count - self.last_full_refresh) >= Config.FULL_REFRESH_CYCLES
+        force_full = (self.update_count - self.last_full_refresh) >= FULL_REFRESH_CYCLES
         
         if use_partial and not force_full:
             # Partial refresh
-            if HAS_EPD:
-                if not self.initialized:
-                    self.init_fast()
-                
-                if partial_mode == "true":
-                    # True partial update - only updates changed pixels
-                    if not self.base_image_set:
-                        # Set base image first time
-                        self.epd.displayPartBaseImage(self.epd.getbuffer(self.image))
-                        self.base_image_set = True
-                        if Config.DEBUG_MODE:
-                            print(f"Display update #{self.update_count} (base image set)")
-                    else:
-                        # Partial update - only changed areas
-                        self.epd.displayPartial(self.epd.getbuffer(self.image))
-                        if Config.DEBUG_MODE:
-                            print(f"Display update #{self.update_count} (true partial)")
+            if not self.initialized:
+                self.init_fast()
+            
+            if partial_mode == "true":
+                # True partial update - only updates changed pixels
+                if not self.base_image_set:
+                    # Set base image first time
+                    self._display_base(buffer)
+                    self.base_image_set = True
+                    if DEBUG_MODE:
+                        print(f"Display update #{self.update_count} (base image set)")
                 else:
-                    # Fast mode - whole screen but faster
-                    self.epd.display_fast(self.epd.getbuffer(self.image))
-                    if Config.DEBUG_MODE:
-                        print(f"Display update #{self.update_count} (fast)")
+                    # Partial update - only changed areas
+                    self._display_partial(buffer)
+                    if DEBUG_MODE:
+                        print(f"Display update #{self.update_count} (true partial)")
             else:
-                self.epd.display_fast(self.epd.getbuffer(self.image))
+                # Fast mode - whole screen but faster
+                self._display_fast(buffer)
+                if DEBUG_MODE:
+                    print(f"Display update #{self.update_count} (fast)")
             
         else:
             # Full refresh (clears ghosting)
             if not self.initialized:
                 self.init()
-            self.epd.display(self.epd.getbuffer(self.image))
+            self._display_full(buffer)
             self.last_full_refresh = self.update_count
             self.base_image_set = False  # Reset base image after full refresh
+            self.partial_erasure = 0
+            self._window_ready = False
             
-            if Config.DEBUG_MODE:
+            if DEBUG_MODE:
                 print(f"Display update #{self.update_count} (full)")
     
+    @property
+    def needs_full_refresh(self) -> bool:
+        """True once partial refreshes changed more than PARTIAL_ERASURE_LIMIT pixels"""
+        return self.partial_erasure >= PARTIAL_ERASURE_LIMIT
+    
+    def display_partial(self):
+        """Push the canvas with a true partial refresh (outside the refresh cycle count)"""
+        dirty = self._dirty
+        if dirty is None or self._buffer is None:
+            self.display_region(0, self.width)
+        else:
+            self.display_region(max(dirty[0], 0), min(dirty[1], self.width))
+    
+    def display_region(self, x0: int, x1: int):
+        """True partial refresh sending only landscape columns x0..x1 (exclusive)
+        
+        Without windowed refresh (or before it is ready) the whole frame is
+        sent, which gives the same picture.
+        """
+        buffer = self.get_buffer()
+        if self._windowed and self._window_ready and 0 <= x0 < x1 <= self.width:
+            # Landscape columns x0..x1 are panel rows width-x1..width-x0
+            stride = (self.height + 7) // 8
+            y0, y1 = self.width - x1, self.width - x0
+            self._display_window(buffer[y0 * stride:y1 * stride], y0, y1)
+        else:
+            self._display_partial(buffer)
+            self._window_ready = self._windowed
+        self._last_digest = zlib.crc32(buffer)
+    
+    def _display_window(self, data: bytearray, y0: int, y1: int):
+        """Write panel rows y0..y1 (exclusive) to the controller and run a partial update"""
+        epd = self.epd
+        epd.SetWindow(0, y0, epd.width - 1, y1 - 1)
+        epd.SetCursor(0, y0)
+        epd.send_command(_WRITE_RAM_BW)
+        epd.send_data2(data)
+        epd.TurnOnDisplayPart()
+    
     def set_base_image(self):
         """Set current image as base for partial updates"""
         if HAS_EPD and self.image is not None:
             if not self.initialized:
                 self.init_fast()
-            self.epd.displayPartBaseImage(self.epd.getbuffer(self.image))
+            self.epd.displayPartBaseImage(self.get_buffer())
             self.base_image_set = True
-            if Config.DEBUG_MODE:
+            if DEBUG_MODE:
                 print("Base image set for partial updates")
     
     def clear(self):
@@ -218,6 +384,47 @@ class DisplayManager:
         
         font = self.get_font(font_size)
         self.draw.text(xy, text, font=font, fill=0, anchor=anchor)
+        if anchor is None:
+            bbox = self.text_bbox(text, font_size)
+            self.mark_dirty(int(xy[0]) + bbox[0], int(xy[0]) + bbox[2] + 1)
+        else:
+            self.mark_dirty(0, self.width)
+    
+    def draw_text_batch(self, items: Iterable[Tuple[Tuple[int, int], str, str]]):
+        """Draw a list of (xy, text, font_size) items, marking them dirty once"""
+        draw = self.draw
+        if draw is None:
+            return
+        
+        text_bbox = self.text_bbox
+        fonts = {}
+        x0, x1 = self.width, 0
+        for xy, text, font_size in items:
+            font = fonts.get(font_size)
+            if font is None:
+                font = fonts[font_size] = self.get_font(font_size)
+            draw.text(xy, text, font=font, fill=0)
+            bbox = text_bbox(text, font_size)
+            x = int(xy[0])
+            x0 = min(x0, x + bbox[0])
+            x1 = max(x1, x + bbox[2] + 1)
+        if x0 < x1:
+            self.mark_dirty(x0, x1)
+    
+    def draw_text_lines(self, xy: Tuple[int, int], lines: Iterable[str], font_size: str = 'medium', pitch: int = 12):
+        """Draw lines of text pitch pixels apart with a single draw call"""
+        if self.draw is None:
+            return
+        
+        lines = list(lines)
+        # multiline_text() advances by the height of "A" plus spacing
+        spacing = pitch - self.text_bbox("A", font_size)[3]
+        self.draw.multiline_text(xy, "\n".join(lines), font=self.get_font(font_size), fill=0, spacing=spacing)
+        
+        x = int(xy[0])
+        bboxes = [self.text_bbox(line, font_size) for line in lines]
+        if bboxes:
+            self.mark_dirty(x + min(b[0] for b in bboxes), x + max(b[2] for b in bboxes) + 1)
     
     def draw_text_centered(
         self,
@@ -230,11 +437,48 @@ class DisplayManager:
             return
         
         font = self.get_font(font_size)
-        # Get text bounding box
-        bbox = self.draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = (self.width - text_width) // 2
+        bbox = self.text_bbox(text, font_size)
+        x = (self.width - (bbox[2] - bbox[0])) // 2
         self.draw.text((x, y), text, font=font, fill=0)
+        self.mark_dirty(x + bbox[0], x + bbox[2] + 1)
+    
+    def draw_clock(self, xy: Tuple[int, int], time_str: str):
+        """Draw the clock time by pasting pre-rendered glyphs"""
+        if self.image is None:
+            return
+        
+        x, y = xy
+        right = x
+        glyphs = self._clock_glyphs
+        for char in time_str:
+            glyph = glyphs.get(char)
+            if glyph is None:
+                # Not pre-rendered, draw it normally (marks itself dirty)
+                self.draw_text((round(x), y), char, CLOCK_FONT)
+                x += self.get_font(CLOCK_FONT).getlength(char)
+                continue
+            mask, advance = glyph
+            self.image.paste(0, (round(x), y), mask)
+            right = max(right, round(x) + mask.width)
+            x += advance
+        self.mark_dirty(xy[0], right)
+    
+    def text_bbox(self, text: str, font_size: str = 'medium') -> Tuple[int, int, int, int]:
+        """Get the bounding box of text drawn at (0, 0) (cached per text and font size)"""
+        key = (text, font_size)
+        bbox = self._text_bboxes.get(key)
+        if bbox is None:
+            if len(self._text_bboxes) >= TEXT_WIDTH_CACHE_SIZE:
+                self._text_bboxes.clear()
+            bbox = self._text_bboxes[key] = tuple(
+                int(v) for v in self._measure.textbbox((0, 0), text, font=self.get_font(font_size))
+            )
+        return bbox
+    
+    def text_width(self, text: str, font_size: str = 'medium') -> int:
+        """Get the rendered width of text (cached per text and font size)"""
+        bbox = self.text_bbox(text, font_size)
+        return bbox[2] - bbox[0]
     
     def draw_icon(self, xy: Tuple[int, int], icon: str, size: int = 16):
         """Draw a simple icon (emoji/character)"""
@@ -243,6 +487,8 @@ class DisplayManager:
         
         font = self.get_font('medium')
         self.draw.text(xy, icon, font=font, fill=0)
+        bbox = self.text_bbox(icon, 'medium')
+        self.mark_dirty(int(xy[0]) + bbox[0], int(xy[0]) + bbox[2] + 1)
     
     def draw_rectangle(
         self,
@@ -257,6 +503,7 @@ class DisplayManager:
         outline_color = 0 if outline else None
         fill_color = 0 if fill else None
         self.draw.rectangle(xy, outline=outline_color, fill=fill_color)
+        self.mark_dirty(min(xy[0], xy[2]), max(xy[0], xy[2]) + 1)
     
     def draw_line(self, xy: Tuple[int, int, int, int], width: int = 1):
         """Draw a line"""
@@ -264,6 +511,7 @@ class DisplayManager:
             return
         
         self.draw.line(xy, fill=0, width=width)
+        self.mark_dirty(min(xy[0], xy[2]) - width, max(xy[0], xy[2]) + width + 1)
     
     def load_sprite(self, sprite_path: Path) -> Optional[Image.Image]:
         """Load a sprite image"""
@@ -281,6 +529,7 @@ class DisplayManager:
             return
         
         self.image.paste(sprite, xy)
+        self.mark_dirty(xy[0], xy[0] + sprite.width)
     
     def save_screenshot(self, filename: str):
         """Save current image as PNG (for debugging)"""
@@ -290,16 +539,22 @@ class DisplayManager:
             print(f"Screenshot saved: {path}")
 
 
-# Singleton instance
-_display_manager: Optional[DisplayManager] = None
+# Singleton instance: `from core.display import display` creates it on first
+# import (PEP 562), after which it is a plain module global
+
+
+def __getattr__(name):
+    if name == "display":
+        return get_display()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_display() -> DisplayManager:
     """Get display manager singleton"""
-    global _display_manager
-    if _display_manager is None:
-        _display_manager = DisplayManager()
-    return _display_manager
+    instance = globals().get("display")
+    if instance is None:
+        instance = globals()["display"] = DisplayManager()
+    return instance
 
 
 if __name__ == "__main__":
@@ -310,7 +565,7 @@ if __name__ == "__main__":
     display.init()
     
     # Test 1: Simple text
-    img, draw = display.create_canvas()
+    img, draw = display.get_canvas()
     display.draw_text_centered(10, "E-Ink Pet Clock", 'large')
     display.draw_text_centered(40, "Display Test", 'medium')
     display.draw_text((10, 70), "Bottom left", 'small')
@@ -321,7 +576,7 @@ if __name__ == "__main__":
     
     # Test 2: Multiple updates
     for i in range(5):
-        img, draw = display.create_canvas()
+        img, draw = display.get_canvas()
         display.draw_text_centered(50, f"Update #{i+1}", 'xlarge')
         display.display(use_partial=True)
         time.sleep(1)
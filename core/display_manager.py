@@ -3,17 +3,56 @@
 Main Display Manager Service for E-Ink Pet Clock
 Runs as systemd service, coordinates display, buttons, and pet state
 """
+import os
+import queue
+import select
 import signal
 import sys
+import threading
 import time
-from pathlib import Path
-from datetime import datetime, timedelta
 
-from core.config import Config
+from core.config import (
+    Config, DEBUG_MODE, CLOCK_UPDATE_INTERVAL, PET_UPDATE_INTERVAL,
+    IDLE_SLEEP_MIN, IDLE_SLEEP_MAX, MAX_IDLE_CYCLES,
+)
 from core.display import get_display
 from core.button_handler import get_button_handler
 from core.menu_system import MenuStateMachine
-from core.state import get_pet_state, get_stats
+from core.state import get_pet_state, get_stats, flush_all
+from core.flag_watcher import FlagWatcher, FLAG_DIR
+
+# Loop intervals (seconds) not covered by Config
+FLAG_CHECK_INTERVAL = 5
+FULL_REFRESH_INTERVAL = 300
+
+# Periodic tasks and their intervals (seconds)
+_PERIODS = {
+    "clock": CLOCK_UPDATE_INTERVAL,
+    "pet": PET_UPDATE_INTERVAL,
+    "anim": IDLE_SLEEP_MIN,  # Backs off towards IDLE_SLEEP_MAX while idle
+    "flag": FLAG_CHECK_INTERVAL,  # Polling fallback, dropped when inotify is active
+    "full": FULL_REFRESH_INTERVAL,
+}
+
+# Tasks held back while a menu transition is in progress
+_DEFER_IN_TRANSITION = frozenset(("clock", "anim", "full"))
+
+# Growth factor of the animation interval per idle wakeup after MAX_IDLE_CYCLES
+IDLE_BACKOFF = 1.5
+
+# Shortest wait in the main loop, so an overdue deadline cannot spin it
+MIN_WAIT = 0.05
+
+# Event kinds on the main loop queue
+EVENT_BUTTON = "button"
+EVENT_FLAGS = "flags"
+
+# Flag files written by the API service, each one requests a re-render
+FLAG_FILES = frozenset(("new_message.flag", "feed_pet.flag", "poke.flag"))
+_FLAG_DIR = str(FLAG_DIR)
+
+# Flags that only change one area of the main menu (others re-render it fully)
+FLAG_REGIONS = {"feed_pet.flag": "stats"}
 
 
 class DisplayManager:
@@ -26,13 +65,31 @@ class DisplayManager:
         self.menu_system = MenuStateMachine(self.display)
         self.pet = get_pet_state()
         self.stats = get_stats()
+        self.flags = None
+        
+        # Main menu animation tick, resolved once (None if it does not animate)
+        self._animate = getattr(self.menu_system.menus[0], 'tick', None)
+        
+        # Button events (pushed by the button handler) and flag files (fed by
+        # a daemon thread), consumed by the main loop so all handling stays
+        # in the main thread
+        self._events = queue.Queue()
+        
+        # Button presses counted in memory, written to stats once a minute
+        self._pending_presses = 0
         
-        # Timing
-        self.last_clock_update = datetime.now()
-        self.last_pet_update = datetime.now()
-        self.last_flag_check = datetime.now()
-        self.last_animation_update = datetime.now()
-        self.last_full_refresh = datetime.now()  # Track last full refresh for 5-minute cycle
+        # Timing: next-due deadline per periodic task on the monotonic clock
+        now = time.monotonic()
+        self._periods = dict(_PERIODS)
+        self._deadlines = {name: now + period for name, period in _PERIODS.items()}
+        self._idle_cycles = 0
+        self._handlers = {
+            "clock": self.update_clock,
+            "pet": self.update_pet_state,
+            "anim": self.update_animation,
+            "flag": self.check_flags,
+            "full": self.check_full_refresh_needed,
+        }
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -46,36 +103,31 @@ class DisplayManager:
         self.shutdown()
         sys.exit(0)
     
-    def process_button_events(self):
-        """Process any pending button events from queue (runs in main thread)"""
-        event = self.buttons.get_event(timeout=0)  # Non-blocking
-        
-        if event is None:
-            return  # No event pending
-        
+    def process_button_event(self, event: str):
+        """Process a button event from the queue (runs in main thread)"""
         # Process the event in main thread (no threading issues!)
         try:
-            self.stats.increment("total_button_presses")
+            self._pending_presses += 1
             
             if event == "return_press":
-                if Config.DEBUG_MODE:
+                if DEBUG_MODE:
                     print("Processing RETURN button event")
                 self.menu_system.handle_return()
                 self.menu_system.request_render()
                 
             elif event == "action_press":
-                if Config.DEBUG_MODE:
+                if DEBUG_MODE:
                     print("Processing ACTION button event")
                 self.menu_system.handle_action()
                 
             elif event == "action_hold":
-                if Config.DEBUG_MODE:
+                if DEBUG_MODE:
                     print("Processing ACTION hold event")
                 # Long press - could do special action
                 self.menu_system.handle_action()
                 
             elif event == "go_press":
-                if Config.DEBUG_MODE:
+                if DEBUG_MODE:
                     print("Processing GO button event")
                 self.menu_system.handle_go()
                 
@@ -90,6 +142,10 @@ class DisplayManager:
         
         # No callback registration needed - we poll the event queue instead
         
+        # Watch for flags from the API (falls back to polling without inotify)
+        self.flags = FlagWatcher()
+        self.check_flags()  # Pick up flags left while the service was down
+        
         # Initial render
         self.menu_system.render_current()
         
@@ -97,131 +153,135 @@ class DisplayManager:
         print("Button mappings:")
         print("  RETURN (GPIO 6):  Feed pet / Back")
         print("  ACTION (GPIO 13): Switch menu")
-        print("Using event queue for button handling (non-blocking)")
+        print("Using event queue for button handling (blocking, event-driven)")
+    
+    def handle_flags(self, names):
+        """Handle flag files reported by the flag watcher or a directory scan"""
+        for name in FLAG_FILES.intersection(names):
+            self.menu_system.request_render(FLAG_REGIONS.get(name))
+            try:
+                os.unlink(os.path.join(_FLAG_DIR, name))
+            except FileNotFoundError:
+                pass
     
     def check_flags(self):
-        """Check for flags from API service"""
-        flag_dir = Path("/tmp/eink_flags")
-        if not flag_dir.exists():
+        """Check for flags from API service (polling fallback)"""
+        # One directory read instead of a stat per flag file
+        try:
+            with os.scandir(_FLAG_DIR) as entries:
+                names = {entry.name for entry in entries if entry.is_file(follow_symlinks=False)}
+        except FileNotFoundError:
             return
         
-        # Check for new message flag
-        new_msg_flag = flag_dir / "new_message.flag"
-        if new_msg_flag.exists():
-            self.menu_system.request_render()
-            new_msg_flag.unlink()
-        
-        # Check for feed flag
-        feed_flag = flag_dir / "feed_pet.flag"
-        if feed_flag.exists():
-            self.menu_system.request_render()
-            feed_flag.unlink()
-        
-        # Check for poke flag
-        poke_flag = flag_dir / "poke.flag"
-        if poke_flag.exists():
-            self.menu_system.request_render()
-            poke_flag.unlink()
+        self.handle_flags(names)
     
     def update_clock(self):
-        """Update clock display (called periodically)"""
-        now = datetime.now()
+        """Update clock display (every minute)"""
+        counters = {}
         
-        # Skip if in menu transition
-        if self.menu_system.is_in_transition():
-            return
+        # If on main menu, update only the time area (coalesced with any
+        # other render requests by render_current)
+        if self.menu_system.current_menu_index == 0:
+            self.menu_system.request_render("time")
+            counters["total_display_updates"] = 1
         
-        # Only update every minute
-        if (now - self.last_clock_update).seconds >= Config.CLOCK_UPDATE_INTERVAL:
-            self.last_clock_update = now
-            
-            # If on main menu, update only the time area
-            if self.menu_system.current_menu_index == 0:
-                main_menu = self.menu_system.menus[0]
-                if hasattr(main_menu, 'update_time_only'):
-                    try:
-                        main_menu.update_time_only()
-                    except Exception as e:
-                        print(f"Error updating time: {e}")
-                        # Reset base image on error
-                        if hasattr(main_menu, 'base_image_set'):
-                            main_menu.base_image_set = False
-                else:
-                    self.menu_system.request_render()
-                self.stats.increment("total_display_updates")
+        self._flush_button_presses(**counters)
+    
+    def _flush_button_presses(self, **counters: int):
+        """Add pending button presses and any given counters to stats in one update"""
+        if self._pending_presses:
+            counters["total_button_presses"] = self._pending_presses
+            self._pending_presses = 0
+        if counters:
+            self.stats.batch_increment(**counters)
     
     def update_pet_state(self):
-        """Update pet state (hunger, happiness decay)"""
-        now = datetime.now()
+        """Update pet state (hunger, happiness decay), every hour"""
+        # Update pet decay
+        self.pet.update_state()
         
-        # Update every hour
-        if (now - self.last_pet_update).seconds >= Config.PET_UPDATE_INTERVAL:
-            self.last_pet_update = now
-            
-            # Update pet decay
-            self.pet.update_state()
-            
-            # If on main menu, re-render to show new state
-            if self.menu_system.current_menu_index == 0:
-                self.menu_system.request_render()
-            
-            if Config.DEBUG_MODE:
-                print(f"Pet updated: H:{self.pet.health} F:{10-self.pet.hunger} M:{self.pet.happiness} Mood:{self.pet.get_mood()}")
+        # If on main menu, re-render to show new state
+        if self.menu_system.current_menu_index == 0:
+            self.menu_system.request_render()
+        
+        if DEBUG_MODE:
+            print(f"Pet updated: H:{self.pet.health} F:{10-self.pet.hunger} M:{self.pet.happiness} Mood:{self.pet.get_mood()}")
     
     def update_animation(self):
-        """Update animation frame"""
-        now = datetime.now()
-        
-        # Skip if in menu transition
-        if self.menu_system.is_in_transition():
+        """Update animation frame (every 0.5 seconds)"""
+        # Only animate on main menu (checked first, this runs twice a second)
+        if self.menu_system.current_menu_index != 0 or self._animate is None:
             return
         
-        # Update every 0.5 seconds
-        time_diff = (now - self.last_animation_update).total_seconds()
-        if time_diff >= 0.5:
-            self.last_animation_update = now
-            
-            # Only animate on main menu
-            if self.menu_system.current_menu_index == 0:
-                # Get the main menu and advance frame, then update only sprite area
-                main_menu = self.menu_system.menus[0]
-                if hasattr(main_menu, 'advance_frame') and hasattr(main_menu, 'update_sprite_only'):
-                    try:
-                        main_menu.advance_frame()
-                        main_menu.update_sprite_only()
-                    except Exception as e:
-                        print(f"Error updating sprite animation: {e}")
-                        # Reset base image on error
-                        if hasattr(main_menu, 'base_image_set'):
-                            main_menu.base_image_set = False
+        # Advance frame, then update only sprite area
+        try:
+            self._animate()
+        except Exception as e:
+            print(f"Error updating sprite animation: {e}")
+            # Reset base image on error
+            main_menu = self.menu_system.menus[0]
+            if hasattr(main_menu, 'base_image_set'):
+                main_menu.base_image_set = False
     
     def check_full_refresh_needed(self):
-        """Check if 5 minutes have passed and do a full refresh"""
-        now = datetime.now()
-        time_diff = (now - self.last_full_refresh).total_seconds()
-        
-        # Skip if in menu transition
-        if self.menu_system.is_in_transition():
+        """Do the scheduled full refresh (every 5 minutes)"""
+        # Only the main menu uses partial refreshes
+        if self.menu_system.current_menu_index != 0:
             return
         
-        # Full refresh every 5 minutes (300 seconds)
-        if time_diff >= 300:
-            self.last_full_refresh = now
-            
-            # If on main menu, do full refresh
-            if self.menu_system.current_menu_index == 0:
-                main_menu = self.menu_system.menus[0]
-                if hasattr(main_menu, 'render_full'):
-                    print("Performing scheduled full refresh (5 min interval)")
-                    try:
-                        main_menu.render_full()
-                    except Exception as e:
-                        print(f"Error during scheduled full refresh: {e}")
-                        # Try to recover
-                        if hasattr(main_menu, 'base_image_set'):
-                            main_menu.base_image_set = False
-                else:
-                    self.menu_system.request_render()
+        main_menu = self.menu_system.menus[0]
+        if hasattr(main_menu, 'render_full'):
+            print("Performing scheduled full refresh (5 min interval)")
+            try:
+                main_menu.render_full()
+            except Exception as e:
+                print(f"Error during scheduled full refresh: {e}")
+                # Try to recover
+                if hasattr(main_menu, 'base_image_set'):
+                    main_menu.base_image_set = False
+        else:
+            self.menu_system.request_render()
+    
+    def run_due_tasks(self, now: float):
+        """Run every periodic task whose deadline has passed"""
+        deadlines = self._deadlines
+        for name, deadline in deadlines.items():
+            if now < deadline:
+                continue
+            # Overdue tasks stay due until the transition has finished
+            if name in _DEFER_IN_TRANSITION and self.menu_system.is_in_transition():
+                continue
+            self._handlers[name]()
+            deadlines[name] = now + self._periods[name]
+    
+    def _note_idle(self):
+        """Count a wakeup without input, slowing the animation once idle for long"""
+        self._idle_cycles += 1
+        if self._idle_cycles > MAX_IDLE_CYCLES:
+            self._periods["anim"] = min(self._periods["anim"] * IDLE_BACKOFF, IDLE_SLEEP_MAX)
+    
+    def _note_activity(self):
+        """Input arrived: back to the full animation rate"""
+        self._idle_cycles = 0
+        if self._periods["anim"] != IDLE_SLEEP_MIN:
+            self._periods["anim"] = IDLE_SLEEP_MIN
+            self._deadlines["anim"] = min(self._deadlines["anim"], time.monotonic() + IDLE_SLEEP_MIN)
+    
+    def _queue_button(self, event: str):
+        """Button handler sink: queue the event for the main loop"""
+        self._events.put((EVENT_BUTTON, event))
+    
+    def _feed_flags(self):
+        """Feeder thread: block on the flag watcher and queue flag names"""
+        try:
+            while self.flags.active:
+                select.select(self.flags.filenos(), [], [])
+                names = self.flags.read()
+                if names:
+                    self._events.put((EVENT_FLAGS, names))
+        except (OSError, ValueError):
+            # Watcher closed during shutdown
+            return
     
     def run(self):
         """Main event loop"""
@@ -230,34 +290,36 @@ class DisplayManager:
         print("Display Manager running...")
         print("Press Ctrl+C to stop")
         
+        self.buttons.set_sink(self._queue_button)
+        if self.flags.watches_files:
+            # Flag files arrive through the event queue, no polling needed
+            del self._deadlines["flag"]
+        if self.flags.active:
+            threading.Thread(target=self._feed_flags, name="flag-events", daemon=True).start()
+        
         try:
             while self.running:
-                # Process button events (from event queue)
-                self.process_button_events()
-                
-                # Check flags from API
-                now = datetime.now()
-                if (now - self.last_flag_check).seconds >= 5:  # Check every 5 seconds
-                    self.check_flags()
-                    self.last_flag_check = now
-                
-                # Update clock periodically
-                self.update_clock()
-                
-                # Update pet state periodically
-                self.update_pet_state()
-                
-                # Update animation frame
-                self.update_animation()
+                # Sleep until an event arrives or the next update is due
+                timeout = max(min(self._deadlines.values()) - time.monotonic(), MIN_WAIT)
+                try:
+                    kind, payload = self._events.get(timeout=timeout)
+                except queue.Empty:
+                    self._note_idle()
+                else:
+                    self._note_activity()
+                    if kind == EVENT_BUTTON:
+                        self.process_button_event(payload)
+                    else:
+                        self.handle_flags(payload)
                 
-                # Check if full refresh needed (every 5 minutes)
-                self.check_full_refresh_needed()
+                # Clock, pet decay, animation, flag polling and full refresh
+                self.run_due_tasks(time.monotonic())
                 
                 # Render if needed (for menu changes, etc.)
                 self.menu_system.render_current()
                 
-                # Sleep to reduce CPU usage (but keep responsive to buttons)
-                time.sleep(0.05)  # 50ms = 20 polls per second
+                # Write state changes older than the save debounce
+                flush_all()
         
         except KeyboardInterrupt:
             print("\nKeyboard interrupt received")
@@ -279,16 +341,21 @@ class DisplayManager:
         
         # Show shutdown message
         try:
-            img, draw = self.display.create_canvas()
+            img, draw = self.display.get_canvas()
             self.display.draw_text_centered(50, "Shutting down...", 'medium')
             self.display.display(use_partial=False)
             time.sleep(1)
         except:
             pass
         
+        self._flush_button_presses()
+        flush_all(force=True)
+        
         # Cleanup hardware
         self.display.sleep()
         self.buttons.cleanup()
+        if self.flags is not None:
+            self.flags.close()
         
         print("Display Manager stopped")
 
@@ -0,0 +1,157 @@
+"""
+Flag file watcher for E-Ink Pet Clock
+The API service signals flags as datagrams on a Unix socket, falling back to
+flag files (seen through Linux inotify) when the display is not listening
+"""
+import ctypes
+import ctypes.util
+import os
+import socket
+import struct
+from pathlib import Path
+from typing import List
+
+# Directory the API service drops flag files into
+FLAG_DIR = Path("/tmp/eink_flags")
+
+# Abstract-namespace (Linux) datagram socket the display listens on, each
+# datagram is one flag name
+SIGNAL_ADDRESS = "\0eink_pet"
+
+# inotify event masks (from <sys/inotify.h>)
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_WATCH_MASK = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO
+
+# struct inotify_event header: wd, mask, cookie, len (name follows)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Try to bind inotify from libc (Linux only)
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    HAS_INOTIFY = True
+except (OSError, AttributeError):
+    HAS_INOTIFY = False
+
+# Sender for signal_flag(), non-blocking so a stuck display cannot stall the API
+try:
+    _signal_sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    _signal_sender.setblocking(False)
+except (AttributeError, OSError):
+    _signal_sender = None
+
+
+def touch_flag(name: str, flag_dir: Path = FLAG_DIR):
+    """Create (or rewrite) a flag file, closing it wakes the watcher"""
+    path = os.path.join(flag_dir, name)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    except FileNotFoundError:
+        # The directory is made at startup, recreate it if /tmp was cleaned
+        flag_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    os.close(fd)
+
+
+def signal_flag(name: str):
+    """Wake the display with a flag: a datagram if it is listening, else a flag file"""
+    if _signal_sender is not None:
+        try:
+            _signal_sender.sendto(name.encode(), SIGNAL_ADDRESS)
+            return
+        except OSError:
+            # Display not running (or not keeping up): it finds the file later
+            pass
+    touch_flag(name)
+
+
+class FlagWatcher:
+    """Reports flags received on the signal socket or written to the flag directory"""
+    
+    def __init__(self, flag_dir: Path = FLAG_DIR):
+        self.flag_dir = flag_dir
+        self.fd = -1
+        self.sock = None
+        
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(SIGNAL_ADDRESS)
+            sock.setblocking(False)
+            self.sock = sock
+        except (AttributeError, OSError) as e:
+            if sock is not None:
+                sock.close()
+            print(f"⚠ Signal socket not available ({e}), using flag files only")
+        
+        if not HAS_INOTIFY:
+            print("⚠ inotify not available, polling flag files")
+            return
+        
+        flag_dir.mkdir(parents=True, exist_ok=True)
+        
+        fd = _inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            print(f"⚠ inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return
+        
+        if _inotify_add_watch(fd, os.fsencode(str(flag_dir)), _WATCH_MASK) < 0:
+            print(f"⚠ Could not watch {flag_dir}: {os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return
+        
+        self.fd = fd
+    
+    @property
+    def active(self) -> bool:
+        """True if flags are delivered as events (socket or inotify)"""
+        return self.fd >= 0 or self.sock is not None
+    
+    @property
+    def watches_files(self) -> bool:
+        """True if flag files are reported through inotify (no polling needed)"""
+        return self.fd >= 0
+    
+    def filenos(self) -> List[int]:
+        """File descriptors for select()"""
+        fds = [self.fd] if self.fd >= 0 else []
+        if self.sock is not None:
+            fds.append(self.sock.fileno())
+        return fds
+    
+    def read(self) -> List[str]:
+        """Drain pending signals and events (non-blocking), returns the flag names seen"""
+        names = []
+        if self.sock is not None:
+            while True:
+                try:
+                    names.append(self.sock.recv(256).decode(errors="ignore"))
+                except BlockingIOError:
+                    break
+        
+        while self.fd >= 0:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name:
+                    names.append(os.fsdecode(name))
+        return names
+    
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
@@ -4,15 +4,17 @@ Handles different menus and their rendering
 """
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, List
-import pytz
+from enum import IntEnum
+from itertools import cycle
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
 from pathlib import Path
 from PIL import Image
 import time
 
 from core.config import Config
-from core.display import DisplayManager
-from core.state import get_pet_state, get_message_log, get_settings, get_stats
+from core.display import DisplayManager, get_display
+from core.state import get_pet_state, get_message_log, get_settings, get_stats, display_text
 
 # Check if we have EPD hardware
 try:
@@ -24,12 +26,91 @@ except ImportError:
 # Path to sprite assets
 SPRITES_DIR = Path(__file__).parent.parent / "assets" / "sprites"
 
+# Device timezone, resolved once from the system tz database
+_TZ = ZoneInfo(Config.DEVICE_TIMEZONE)
+
+# strftime formats as (without seconds, with seconds) per time format setting
+TIME_FORMATS_12H = ("%I:%M %p", "%I:%M:%S %p")
+TIME_FORMATS_24H = ("%H:%M", "%H:%M:%S")
+DATE_FORMAT = "%a, %b %d"
+
+# Pitch of the main menu's stat lines (tight, 12pt font height)
+STATS_LINE_HEIGHT = 11
+
+# Animation sequence per mood (properly extracted frames)
+_ANIMATION_MAP = {
+    "happy": tuple("BunnyRun_frame%02d.png" % i for i in range(5)),      # Running happily
+    "neutral": tuple("BunnyIdle_frame%02d.png" % i for i in range(8)),   # Idle breathing
+    "sad": tuple("BunnyLieDown_frame%02d.png" % i for i in range(2)),    # Lying down
+    "hungry": tuple("BunnyAttack_frame%02d.png" % i for i in range(7)),  # Attacking for food
+    "sick": tuple("BunnyHurt_frame%02d.png" % i for i in range(3)),      # Hurt/sick
+    "sleeping": tuple("BunnySleep_frame%02d.png" % i for i in range(2)), # Sleeping
+    "dead": tuple("BunnyDead_frame%02d.png" % i for i in range(9)),      # Death animation
+}
+
+# ASCII bunny drawn when a sprite file is missing
+_BUNNY_ART = ("(\\___/)", "( o.o )", " > ^ <")
+
+# Text emoticon per mood for the stats bar
+_MOOD_TO_ICON = {
+    "happy": ":)",
+    "neutral": ":|",
+    "sad": ":(",
+    "hungry": ":P",
+    "sick": ":X",
+    "sleeping": "ZZ",
+    "dead": "XX",
+}
+
+# Five-step gauges indexed by level (0-5)
+_HAPPINESS_STARS = tuple("★" * n + "☆" * (5 - n) for n in range(6))
+_BRIGHTNESS_BARS = tuple("■" * n + "□" * (5 - n) for n in range(6))
+
+# Sprites decoded and scaled once: filename -> 64x64 1-bit image (None if missing)
+SPRITE_SIZE = 64
+_SPRITE_CACHE = {}
+
+# Sprite files present at startup, scanned once instead of a stat per frame
+_AVAILABLE_SPRITES = frozenset(p.name for p in SPRITES_DIR.iterdir()) if SPRITES_DIR.is_dir() else frozenset()
+
+
+def _get_sprite(filename: str) -> Optional[Image.Image]:
+    """Get a sprite scaled to SPRITE_SIZE and converted to 1-bit (cached)"""
+    try:
+        return _SPRITE_CACHE[filename]
+    except KeyError:
+        pass
+    
+    sprite = None
+    if filename in _AVAILABLE_SPRITES:
+        with Image.open(SPRITES_DIR / filename) as source:
+            # NEAREST for pixel art, then the same 1-bit conversion paste() does
+            sprite = source.resize((SPRITE_SIZE, SPRITE_SIZE), Image.NEAREST).convert('1')
+    _SPRITE_CACHE[filename] = sprite
+    return sprite
+
 
 class Menu(ABC):
     """Base class for all menus"""
     
+    # Time formats for the current 12/24h setting, shared by all menus
+    # (None until first use, reset by invalidate_time_format())
+    _time_formats = None
+    
+    # Last formatted strings, shared by all menus: format -> (tick, text) and
+    # (minute, text). Time zone offsets are whole minutes, so the text can
+    # only change when the epoch second/minute does.
+    _time_cache = {}
+    _date_cache = (None, "")
+    
+    # Text items and lines that never change (header, divider, button hints),
+    # drawn once into a bitmap that later renders start from
+    CHROME_TEXT = ()
+    CHROME_LINES = ()
+    
     def __init__(self, display: DisplayManager):
         self.display = display
+        self._chrome = None
     
     @abstractmethod
     def render(self):
@@ -46,71 +127,189 @@ class Menu(ABC):
         """Handle GO button press"""
         pass
     
+    def get_chrome_canvas(self):
+        """Get the canvas with this menu's static text and lines already drawn"""
+        if self._chrome is None:
+            img, draw = self.display.get_canvas()
+            self.display.draw_text_batch(self.CHROME_TEXT)
+            for line in self.CHROME_LINES:
+                self.display.draw_line(line)
+            self._chrome = img.copy()
+            return img, draw
+        
+        img, draw = self.display.get_canvas(clear=False)
+        img.paste(self._chrome)
+        self.display.mark_dirty(0, self.display.width)
+        return img, draw
+    
+    @classmethod
+    def invalidate_time_format(cls):
+        """Re-read the 12/24h setting on the next time format"""
+        Menu._time_formats = None
+    
     def get_current_time_str(self, include_seconds: bool = False) -> str:
         """Get formatted time string"""
-        settings = get_settings()
-        tz = pytz.timezone(Config.DEVICE_TIMEZONE)
-        now = datetime.now(tz)
+        formats = Menu._time_formats
+        if formats is None:
+            time_format = get_settings().get("time_format", Config.TIME_FORMAT)
+            formats = Menu._time_formats = TIME_FORMATS_12H if time_format == 12 else TIME_FORMATS_24H
         
-        time_format = settings.get("time_format", Config.TIME_FORMAT)
+        fmt = formats[include_seconds]
+        tick = int(time.time()) if include_seconds else int(time.time()) // 60
+        cached = Menu._time_cache.get(fmt)
+        if cached is not None and cached[0] == tick:
+            return cached[1]
         
-        if time_format == 12:
-            if include_seconds:
-                return now.strftime("%I:%M:%S %p")
-            return now.strftime("%I:%M %p")
-        else:
-            if include_seconds:
-                return now.strftime("%H:%M:%S")
-            return now.strftime("%H:%M")
+        text = datetime.now(_TZ).strftime(fmt)
+        Menu._time_cache[fmt] = (tick, text)
+        return text
     
     def get_current_date_str(self) -> str:
         """Get formatted date string"""
-        tz = pytz.timezone(Config.DEVICE_TIMEZONE)
-        now = datetime.now(tz)
-        return now.strftime("%a, %b %d")
+        minute = int(time.time()) // 60
+        if Menu._date_cache[0] != minute:
+            Menu._date_cache = (minute, datetime.now(_TZ).strftime(DATE_FORMAT))
+        return Menu._date_cache[1]
 
 
 class TamagotchiMenu(Menu):
     """Main menu with tamagotchi and clock"""
     
+    # web.network_client.send_poke, imported on the first poke
+    _send_poke = None
+    
     def __init__(self, display: DisplayManager):
         super().__init__(display)
         # Animation state
-        self.current_frame = 0
-        self.last_frame_time = 0
-        self.animation_frames = []
+        self.current_frame = 0  # Advanced by the display loop's monotonic animation deadline
+        self.animation_frames = ()
         self.current_mood = None
+        self._frame_cycle = None  # Endless (index, filename, sprite) ring for the mood
+        self._frame_file = None
+        self._frame_sprite = None
         self.base_image_set = False  # Track if base image is set for partial updates
         
+        # Sprite frame and time last sent to the panel, to skip no-op partial updates
+        self._last_pushed_sprite: Optional[str] = None
+        self._last_pushed_time_str: Optional[str] = None
+        
+        # Static chrome (date, divider, button hints), redrawn when the date changes
+        self._base_image = None
+        self._base_date = None
+        self._base_dirty = True
+        
+        # State versions (pet, messages, stats) shown by the last render
+        self._state_versions = None
+        
+        # (health, hunger, mood) -> stat lines, so unchanged stats reuse their strings
+        self._stats_lines_cache = {}
+        
         # Sprite position (for partial updates)
         self.sprite_x = 250 - 64 - 5  # Right side with 5px margin
         self.sprite_y = 18  # Aligned with time
         self.sprite_size = 64
         
+        # Stats block position (for partial updates), between time and divider
+        # Time is at y=18 with 48pt font, which takes ~48-64px height
+        # So time ends around y=66-82. Start stats at y=70 to avoid overlap
+        self.stats_x = 5
+        self.stats_y = 70
+        self.stats_width = 170
+        self.stats_height = 35
+        
+        # Region name -> partial update, for MenuStateMachine.request_render(region)
+        self.region_updaters = {
+            "time": self.update_time_only,
+            "sprite": self.update_sprite_only,
+            "stats": self.update_stats_only,
+        }
+        self._region_drawers = {
+            "time": self._draw_time,
+            "sprite": self._draw_sprite,
+            "stats": self._draw_stats,
+        }
+        
         # Time position (for partial updates)
         self.time_x = 5
         self.time_y = 18
         self.time_width = 170  # Approximate width for time text
         self.time_height = 50  # Approximate height for 48pt font
-    
-    def _get_animation_frames(self, mood: str) -> List[str]:
-        """Get list of frame filenames for a given mood"""
-        # Map moods to animation sequences (properly extracted frames)
-        animation_map = {
-            "happy": ["BunnyRun_frame{:02d}.png".format(i) for i in range(5)],      # Running happily
-            "neutral": ["BunnyIdle_frame{:02d}.png".format(i) for i in range(8)],   # Idle breathing
-            "sad": ["BunnyLieDown_frame{:02d}.png".format(i) for i in range(2)],    # Lying down
-            "hungry": ["BunnyAttack_frame{:02d}.png".format(i) for i in range(7)],  # Attacking for food
-            "sick": ["BunnyHurt_frame{:02d}.png".format(i) for i in range(3)],      # Hurt/sick
-            "sleeping": ["BunnySleep_frame{:02d}.png".format(i) for i in range(2)], # Sleeping
-            "dead": ["BunnyDead_frame{:02d}.png".format(i) for i in range(9)]       # Death animation
+        
+        # Decode every animation frame up front so renders never touch disk
+        self._mood_frames = {
+            mood: tuple((index, filename, _get_sprite(filename)) for index, filename in enumerate(frames))
+            for mood, frames in _ANIMATION_MAP.items()
         }
-        return animation_map.get(mood, animation_map["neutral"])
+    
+    def _get_animation_frames(self, mood: str) -> Tuple[str, ...]:
+        """Get the frame filenames for a given mood"""
+        return _ANIMATION_MAP.get(mood, _ANIMATION_MAP["neutral"])
+    
+    def _set_mood(self, mood: str):
+        """Restart the animation at the first frame for mood"""
+        self.current_mood = mood
+        self.animation_frames = self._get_animation_frames(mood)
+        self._frame_cycle = cycle(self._mood_frames.get(mood, self._mood_frames["neutral"]))
+        self.current_frame, self._frame_file, self._frame_sprite = next(self._frame_cycle)
     
     def advance_frame(self):
         """Advance to next animation frame"""
-        if self.animation_frames:
-            self.current_frame = (self.current_frame + 1) % len(self.animation_frames)
+        if self._frame_cycle is not None:
+            self.current_frame, self._frame_file, self._frame_sprite = next(self._frame_cycle)
+    
+    def tick(self):
+        """Show the next animation frame (partial update of the sprite only)
+        
+        Called by the display loop on its monotonic animation deadline, which
+        sets the frame rate (and slows it down while idle). A minute rollover
+        since the last clock update goes out in the same partial update.
+        """
+        self.advance_frame()
+        self.update_dirty()
+    
+    def _render_static(self, date_str: str):
+        """Draw the parts of the layout that only change with the date"""
+        self.display.draw_text_batch((
+            ((5, 2), date_str, 'small'),  # Top: Date (top left)
+            # Button hints (very bottom, below divider)
+            ((3, 109), "[Feed]", 'small'),
+            ((88, 109), "[Menu>]", 'small'),
+            ((205, 109), "[Poke]", 'small'),
+        ))
+        
+        # Bottom divider line - positioned to be below all stats
+        self.display.draw_line((0, 106, 250, 106))
+    
+    def _stats_lines(self, pet, mood: str) -> Tuple[str, str, str]:
+        """The three labelled pet stat lines"""
+        key = (pet.health, pet.hunger, mood)
+        lines = self._stats_lines_cache.get(key)
+        if lines is None:
+            lines = self._stats_lines_cache[key] = self._format_stats_lines(*key)
+        return lines
+    
+    @staticmethod
+    def _format_stats_lines(health: int, hunger: int, mood: str) -> Tuple[str, str, str]:
+        """Build the stat lines for the given values"""
+        # Health with label (line 1)
+        health_icons = "<3 " * min(health // 3, 3)
+        health_display = health_icons if health_icons else "<3 "
+        
+        # Hunger with label (line 2)
+        hunger_level = max(0, min(3, hunger // 3))
+        if hunger_level == 0:
+            hunger_display = "Full"
+        else:
+            hunger_display = "*" * hunger_level
+        
+        # Mood with label and emoji (line 3)
+        mood_icon = _MOOD_TO_ICON.get(mood, ":|")
+        
+        return (f"Health: {health_display}", f"Food:   {hunger_display}", f"Mood:   {mood_icon}")
+    
+    def invalidate_static(self):
+        """Redraw the static chrome on the next render"""
+        self._base_dirty = True
     
     def render_full(self):
         """Full render - sets the base image for partial updates"""
@@ -122,8 +321,6 @@ class TamagotchiMenu(Menu):
         Args:
             is_base_render: If True, renders full image and sets as base for partial updates
         """
-        img, draw = self.display.create_canvas()
-        
         pet = get_pet_state()
         msg_log = get_message_log()
         stats = get_stats()
@@ -132,53 +329,54 @@ class TamagotchiMenu(Menu):
         time_str = self.get_current_time_str()
         date_str = self.get_current_date_str()
         
+        # Nothing but the clock and animation can differ from the panel, so
+        # skip re-reading the message log and stats
+        versions = (pet.version, msg_log.version, stats.version)
+        if (versions == self._state_versions and self.base_image_set and not is_base_render
+                and not self._base_dirty and date_str == self._base_date):
+            self.update_dirty()
+            return
+        self._state_versions = versions
+        
         # OPTIMIZED LAYOUT - Use all available space:
-        # Top: Date (top left)
-        self.display.draw_text((5, 2), date_str, 'small')
+        # Static chrome is drawn once per day and copied in on later renders
+        if self._base_dirty or date_str != self._base_date:
+            img, draw = self.display.get_canvas()
+            self._render_static(date_str)
+            self._base_image = img.copy()
+            self._base_date = date_str
+            self._base_dirty = False
+        else:
+            img, draw = self.display.get_canvas(clear=False)
+            img.paste(self._base_image)
+            self.display.mark_dirty(0, self.display.width)
+        
+        # Text is collected and drawn in one batch
+        items = []
         
         # Messages indicator (top right corner)
         unread = msg_log.get_unread_count()
         if unread > 0:
-            self.display.draw_text((200, 2), f"{unread} msgs", 'small')
+            items.append(((200, 2), f"{unread} msgs", 'small'))
         
         # Network error indicator (top right corner, after messages)
         if stats.get("last_error"):
-            self.display.draw_text((235, 2), "!", 'small')
+            items.append(((235, 2), "!", 'small'))
         
         # Big Time (left side, 48pt font)
-        self.display.draw_text((5, 18), time_str, 'huge')  # 48pt font
+        self.display.draw_clock((5, 18), time_str)  # 48pt font
         
         # Bunny sprite with animation (right side, aligned with time)
         mood = pet.get_mood()
         
         # Update animation frames if mood changed
         if mood != self.current_mood:
-            self.current_mood = mood
-            self.animation_frames = self._get_animation_frames(mood)
-            self.current_frame = 0
+            self._set_mood(mood)
         
-        # Get current frame filename
-        if self.animation_frames:
-            sprite_filename = self.animation_frames[self.current_frame]
-        else:
-            # Fallback to static sprite
-            sprite_filename = {
-                "happy": "happy.png",
-                "neutral": "neutral.png",
-                "sad": "sad.png",
-                "hungry": "excited.png",
-                "sick": "sick.png",
-                "sleeping": "sleeping.png",
-                "dead": "dead.png"
-            }.get(mood, "neutral.png")
-        
-        sprite_path = SPRITES_DIR / sprite_filename
-        
-        if sprite_path.exists():
-            # Load sprite and resize to 64x64 (double size)
-            sprite = Image.open(sprite_path)
-            sprite_large = sprite.resize((64, 64), Image.NEAREST)  # NEAREST for pixel art
-            
+        sprite_filename = self._frame_file
+        sprite_large = self._frame_sprite  # 64x64 (double size)
+        
+        if sprite_large is not None:
             # Position on right side, aligned with time
             sprite_x = 250 - 64 - 5  # Right side with 5px margin
             sprite_y = 18  # Aligned with time
@@ -187,53 +385,15 @@ class TamagotchiMenu(Menu):
             img.paste(sprite_large, (sprite_x, sprite_y))
         else:
             # Fallback to ASCII art if sprite not found
-            pet_x, pet_y = 180, 30
-            bunny_art = [
-                "(\\___/)",
-                "( o.o )",
-                " > ^ <"
-            ]
-            for i, line in enumerate(bunny_art):
-                self.display.draw_text((pet_x, pet_y + i * 12), line, 'small')
-        
-        # Pet stats (right below time text, stacked vertically with labels)
-        # Time is at y=18 with 48pt font, which takes ~48-64px height
-        # So time ends around y=66-82. Start stats at y=70 to avoid overlap
-        stats_start_y = 70  # Moved down to avoid overlap with 48pt time
-        line_height = 11  # Tight line spacing (12pt font height)
-        
-        # Health with label (line 1)
-        health_icons = "<3 " * min(pet.health // 3, 3)
-        health_display = health_icons if health_icons else "<3 "
-        self.display.draw_text((5, stats_start_y), f"Health: {health_display}", 'small')
-        
-        # Hunger with label (line 2)
-        hunger_level = max(0, min(3, pet.hunger // 3))
-        if hunger_level == 0:
-            hunger_display = "Full"
-        else:
-            hunger_display = "*" * hunger_level
-        self.display.draw_text((5, stats_start_y + line_height), f"Food:   {hunger_display}", 'small')
+            self.display.draw_text_lines((180, 30), _BUNNY_ART, 'small', 12)
         
-        # Mood with label and emoji (line 3)
-        mood_icon = {
-            "happy": ":)",
-            "neutral": ":|",
-            "sad": ":(",
-            "hungry": ":P",
-            "sick": ":X",
-            "sleeping": "ZZ",
-            "dead": "XX"
-        }.get(mood, ":|")
-        self.display.draw_text((5, stats_start_y + line_height * 2), f"Mood:   {mood_icon}", 'small')
+        self.display.draw_text_batch(items)
         
-        # Bottom divider line - positioned to be below all stats
-        self.display.draw_line((0, 106, 250, 106))
+        # Pet stats (right below time text, stacked vertically with labels)
+        self.display.draw_text_lines((self.stats_x, self.stats_y), self._stats_lines(pet, mood), 'small', STATS_LINE_HEIGHT)
         
-        # Button hints (very bottom, below divider)
-        self.display.draw_text((3, 109), "[Feed]", 'small')
-        self.display.draw_text((88, 109), "[Menu>]", 'small')
-        self.display.draw_text((205, 109), "[Poke]", 'small')
+        self._last_pushed_sprite = sprite_filename if sprite_large is not None else None
+        self._last_pushed_time_str = time_str
         
         # Display strategy
         if is_base_render or not self.base_image_set:
@@ -241,10 +401,9 @@ class TamagotchiMenu(Menu):
             self.display.display(use_partial=False)  # Full refresh to clear ghosting
             # Now set this as the base for partial updates
             if HAS_EPD:
-                from core.display import get_display
                 display_obj = get_display()
                 if hasattr(display_obj, 'epd'):
-                    display_obj.epd.displayPartBaseImage(display_obj.epd.getbuffer(img))
+                    display_obj.epd.displayPartBaseImage(display_obj.get_buffer())
                     self.base_image_set = True
                     if Config.DEBUG_MODE:
                         print("Base image set for partial updates")
@@ -252,8 +411,12 @@ class TamagotchiMenu(Menu):
             # Partial update - only changed areas
             self.display.display(use_partial=True, partial_mode="true")
     
-    def update_sprite_only(self):
-        """Update only the sprite area (for animation)"""
+    def update_dirty(self, regions=("time", "sprite")):
+        """Redraw the given regions and push them in one partial update
+        
+        Regions the panel already shows (same frame, same minute) are
+        skipped, so nothing is sent when none of them changed.
+        """
         if not self.base_image_set:
             # Need base image first - trigger full render
             if Config.DEBUG_MODE:
@@ -262,7 +425,6 @@ class TamagotchiMenu(Menu):
             return
         
         # Validate display state
-        from core.display import get_display
         display_obj = get_display()
         
         if not display_obj.image or not display_obj.draw:
@@ -270,87 +432,100 @@ class TamagotchiMenu(Menu):
             self.base_image_set = False
             return
         
+        if display_obj.needs_full_refresh:
+            # Partial refreshes left too much ghosting
+            self.render_full()
+            return
+        
+        try:
+            changed = []
+            for region in regions:
+                if self._region_drawers[region](display_obj):
+                    changed.append(region)
+            
+            # One partial update covering every changed area
+            if changed and hasattr(display_obj, 'epd') and HAS_EPD:
+                display_obj.display_partial()
+                if Config.DEBUG_MODE:
+                    print(f"Updated {', '.join(changed)} (frame {self.current_frame})")
+        except Exception as e:
+            print(f"Error updating {', '.join(regions)}: {e}")
+            self.base_image_set = False  # Reset on error
+    
+    def update_sprite_only(self):
+        """Update only the sprite area (for animation)"""
+        self.update_dirty(("sprite",))
+    
+    def update_time_only(self):
+        """Update only the time area"""
+        self.update_dirty(("time",))
+    
+    def update_stats_only(self):
+        """Update only the pet stats block"""
+        self.update_dirty(("stats",))
+    
+    def _draw_sprite(self, display_obj) -> bool:
+        """Paste the current animation frame, False if the panel already shows it"""
         pet = get_pet_state()
         mood = pet.get_mood()
         
         # Update animation frames if mood changed
         if mood != self.current_mood:
-            self.current_mood = mood
-            self.animation_frames = self._get_animation_frames(mood)
-            self.current_frame = 0
+            self._set_mood(mood)
         
-        # Get current frame filename
-        if self.animation_frames:
-            sprite_filename = self.animation_frames[self.current_frame]
-        else:
-            sprite_filename = "neutral.png"
+        # Same frame as on the panel (2-frame moods, backed-off animation)
+        sprite_filename = self._frame_file
+        if sprite_filename == self._last_pushed_sprite:
+            return False
         
-        sprite_path = SPRITES_DIR / sprite_filename
+        sprite_large = self._frame_sprite
+        if sprite_large is None:
+            return False
         
-        if sprite_path.exists():
-            try:
-                # Clear the sprite area (draw white rectangle)
-                display_obj.draw.rectangle(
-                    [(self.sprite_x, self.sprite_y), 
-                     (self.sprite_x + self.sprite_size, self.sprite_y + self.sprite_size)],
-                    fill=255
-                )
-                
-                # Load and paste new sprite
-                sprite = Image.open(sprite_path)
-                sprite_large = sprite.resize((self.sprite_size, self.sprite_size), Image.NEAREST)
-                display_obj.image.paste(sprite_large, (self.sprite_x, self.sprite_y))
-                
-                # Partial update only the sprite area
-                if hasattr(display_obj, 'epd') and HAS_EPD:
-                    display_obj.epd.displayPartial(display_obj.epd.getbuffer(display_obj.image))
-                    if Config.DEBUG_MODE:
-                        print(f"Sprite updated (frame {self.current_frame})")
-            except Exception as e:
-                print(f"Error updating sprite: {e}")
-                self.base_image_set = False  # Reset on error
+        # The opaque 1-bit frame replaces the whole sprite area in one copy
+        # (no clearing needed)
+        display_obj.paste_sprite(sprite_large, (self.sprite_x, self.sprite_y))
+        self._last_pushed_sprite = sprite_filename
+        return True
     
-    def update_time_only(self):
-        """Update only the time area"""
-        if not self.base_image_set:
-            # Need base image first
-            if Config.DEBUG_MODE:
-                print("Base image not set for time update, triggering full render")
-            self.render_full()
-            return
-        
-        from core.display import get_display
-        display_obj = get_display()
+    def _draw_time(self, display_obj) -> bool:
+        """Redraw the clock, False if the minute has not rolled over"""
+        time_str = self.get_current_time_str()
+        if time_str == self._last_pushed_time_str:
+            return False
         
-        if not display_obj.image or not display_obj.draw:
-            print("⚠ Display state invalid for time update, resetting base image")
-            self.base_image_set = False
-            return
+        # Clear the time area (draw white rectangle)
+        display_obj.draw.rectangle(
+            [(self.time_x, self.time_y), 
+             (self.time_x + self.time_width, self.time_y + self.time_height)],
+            fill=255
+        )
+        display_obj.mark_dirty(self.time_x, self.time_x + self.time_width + 1)
+        
+        # Redraw time
+        display_obj.draw_clock((self.time_x, self.time_y), time_str)
+        self._last_pushed_time_str = time_str
+        return True
+    
+    def _draw_stats(self, display_obj) -> bool:
+        """Redraw the pet stats block"""
+        # Clear the stats area (draw white rectangle)
+        display_obj.draw.rectangle(
+            [(self.stats_x, self.stats_y),
+             (self.stats_x + self.stats_width, self.stats_y + self.stats_height)],
+            fill=255
+        )
+        display_obj.mark_dirty(self.stats_x, self.stats_x + self.stats_width + 1)
         
-        try:
-            # Clear the time area (draw white rectangle)
-            display_obj.draw.rectangle(
-                [(self.time_x, self.time_y), 
-                 (self.time_x + self.time_width, self.time_y + self.time_height)],
-                fill=255
-            )
-            
-            # Redraw time
-            time_str = self.get_current_time_str()
-            display_obj.draw_text((self.time_x, self.time_y), time_str, 'huge')
-            
-            # Partial update only the time area
-            if hasattr(display_obj, 'epd') and HAS_EPD:
-                display_obj.epd.displayPartial(display_obj.epd.getbuffer(display_obj.image))
-                if Config.DEBUG_MODE:
-                    print("Time updated")
-        except Exception as e:
-            print(f"Error updating time: {e}")
-            self.base_image_set = False  # Reset on error
+        pet = get_pet_state()
+        display_obj.draw_text_lines((self.stats_x, self.stats_y), self._stats_lines(pet, pet.get_mood()), 'small', STATS_LINE_HEIGHT)
+        return True
+    
     
     def reset_base_image(self):
         """Reset base image flag when menu changes"""
         self.base_image_set = False
+        self._base_dirty = True
     
     def on_return(self):
         """Feed the pet"""
@@ -362,14 +537,20 @@ class TamagotchiMenu(Menu):
     
     def on_go(self):
         """Send message to other device (handled by network layer)"""
-        from web.network_client import send_poke  # Avoid circular import
+        send_poke = TamagotchiMenu._send_poke
+        if send_poke is None:
+            from web.network_client import send_poke  # Avoid circular import
+            TamagotchiMenu._send_poke = send_poke
         pet = get_pet_state()
         stats = get_stats()
         
         try:
+            # Waits for delivery, so only pokes the remote accepted are counted
             if send_poke():
                 pet.message_sent()
                 stats.increment("total_messages_sent")
+            else:
+                stats.record_error("Poke not delivered")
         except Exception as e:
             print(f"Error sending poke: {e}")
             stats.record_error(str(e))
@@ -381,27 +562,34 @@ class TamagotchiMenu(Menu):
 class MessagesMenu(Menu):
     """Message inbox view"""
     
+    CHROME_TEXT = (
+        # Button hints
+        ((3, 110), "[Del]", 'small'),
+        ((88, 110), "[Menu>]", 'small'),
+        ((205, 110), "[Read]", 'small'),
+    )
+    CHROME_LINES = ((5, 22, 245, 22),)
+    
     def __init__(self, display: DisplayManager):
         super().__init__(display)
         self.selected_index = 0
     
     def render(self, use_partial=True):
         """Render message list"""
-        img, draw = self.display.create_canvas()
+        img, draw = self.get_chrome_canvas()
         
         msg_log = get_message_log()
         messages = msg_log.get_messages(limit=5)
+        items = []
         
         # Header
         unread = msg_log.get_unread_count()
         header = f"Messages ({len(messages)})" + (f" - {unread} new" if unread > 0 else "")
-        self.display.draw_text((5, 5), header, 'medium')
+        items.append(((5, 5), header, 'medium'))
         
         # Small time in corner
         time_str = self.get_current_time_str()
-        self.display.draw_text((180, 5), time_str, 'small')
-        
-        self.display.draw_line((5, 22, 245, 22))
+        items.append(((180, 5), time_str, 'small'))
         
         # Message list
         if not messages:
@@ -411,21 +599,16 @@ class MessagesMenu(Menu):
             for i, msg in enumerate(messages[:3]):  # Show up to 3 messages
                 prefix = ">" if i == self.selected_index else " "
                 from_device = msg.get("from", "Unknown")
-                text = msg.get("message", "")
-                
-                # Truncate long messages
-                if len(text) > 20:
-                    text = text[:17] + "..."
+                # Truncated when the message was logged (older entries lack it)
+                text = msg.get("display")
+                if text is None:
+                    text = display_text(msg.get("message", ""))
                 
                 msg_text = f"{prefix} {text} -{from_device}"
-                self.display.draw_text((5, y_offset), msg_text, 'small')
+                items.append(((5, y_offset), msg_text, 'small'))
                 y_offset += 16
         
-        # Button hints
-        self.display.draw_text((3, 110), "[Del]", 'small')
-        self.display.draw_text((88, 110), "[Menu>]", 'small')
-        self.display.draw_text((205, 110), "[Read]", 'small')
-        
+        self.display.draw_text_batch(items)
         self.display.display(use_partial=use_partial)
     
     def on_return(self):
@@ -445,23 +628,29 @@ class MessagesMenu(Menu):
 class StatsMenu(Menu):
     """Statistics and history view"""
     
+    CHROME_TEXT = (
+        ((5, 5), "Pet Stats", 'medium'),
+        # Button hints - no left action, middle cycles, right refreshes
+        ((88, 110), "[Menu>]", 'small'),
+        ((190, 110), "[Refresh]", 'small'),
+    )
+    CHROME_LINES = ((5, 22, 245, 22),)
+    
     def __init__(self, display: DisplayManager):
         super().__init__(display)
         self.page = 0
     
     def render(self, use_partial=True):
         """Render statistics"""
-        img, draw = self.display.create_canvas()
+        img, draw = self.get_chrome_canvas()
         
         pet = get_pet_state()
         stats = get_stats()
+        items = []
         
-        # Header
-        self.display.draw_text((5, 5), "Pet Stats", 'medium')
+        # Header time
         time_str = self.get_current_time_str()
-        self.display.draw_text((180, 5), time_str, 'small')
-        
-        self.display.draw_line((5, 22, 245, 22))
+        items.append(((180, 5), time_str, 'small'))
         
         # Stats content
         y = 30
@@ -470,31 +659,28 @@ class StatsMenu(Menu):
         # Age
         age_days = pet.age_hours // 24
         age_hours = pet.age_hours % 24
-        self.display.draw_text((10, y), f"Age: {age_days}d {age_hours}h", 'small')
+        items.append(((10, y), f"Age: {age_days}d {age_hours}h", 'small'))
         y += line_height
         
         # Feeds
-        self.display.draw_text((10, y), f"Fed: {pet.get('total_feeds', 0)} times", 'small')
+        items.append(((10, y), f"Fed: {pet.get('total_feeds', 0)} times", 'small'))
         y += line_height
         
         # Messages
         sent = pet.get('messages_sent', 0)
         received = pet.get('messages_received', 0)
-        self.display.draw_text((10, y), f"Msgs: {sent} sent, {received} rcv", 'small')
+        items.append(((10, y), f"Msgs: {sent} sent, {received} rcv", 'small'))
         y += line_height
         
         # Happiness rating
-        happiness_stars = "★" * (pet.happiness // 2) + "☆" * (5 - pet.happiness // 2)
-        self.display.draw_text((10, y), f"Mood: {happiness_stars}", 'small')
+        happiness_stars = _HAPPINESS_STARS[min(max(pet.happiness // 2, 0), 5)]
+        items.append(((10, y), f"Mood: {happiness_stars}", 'small'))
         y += line_height
         
         # Current stats
-        self.display.draw_text((10, y), f"H:{pet.health} F:{10-pet.hunger} M:{pet.happiness}", 'small')
-        
-        # Button hints - no left action, middle cycles, right refreshes
-        self.display.draw_text((88, 110), "[Menu>]", 'small')
-        self.display.draw_text((190, 110), "[Refresh]", 'small')
+        items.append(((10, y), f"H:{pet.health} F:{10-pet.hunger} M:{pet.happiness}", 'small'))
         
+        self.display.draw_text_batch(items)
         self.display.display(use_partial=use_partial)
     
     def on_return(self):
@@ -509,6 +695,15 @@ class StatsMenu(Menu):
 class SettingsMenu(Menu):
     """Settings configuration view"""
     
+    CHROME_TEXT = (
+        ((5, 5), "Settings", 'medium'),
+        # Button hints - left=prev item, middle=menu, right=change value
+        ((3, 110), "[<Prev]", 'small'),
+        ((88, 110), "[Menu>]", 'small'),
+        ((190, 110), "[Change]", 'small'),
+    )
+    CHROME_LINES = ((5, 22, 245, 22),)
+    
     def __init__(self, display: DisplayManager):
         super().__init__(display)
         self.selected_item = 0
@@ -516,16 +711,14 @@ class SettingsMenu(Menu):
     
     def render(self, use_partial=True):
         """Render settings"""
-        img, draw = self.display.create_canvas()
+        img, draw = self.get_chrome_canvas()
         
         settings = get_settings()
+        items = []
         
-        # Header
-        self.display.draw_text((5, 5), "Settings", 'medium')
+        # Header time
         time_str = self.get_current_time_str()
-        self.display.draw_text((180, 5), time_str, 'small')
-        
-        self.display.draw_line((5, 22, 245, 22))
+        items.append(((180, 5), time_str, 'small'))
         
         # Settings list
         y = 30
@@ -534,31 +727,27 @@ class SettingsMenu(Menu):
         # Time format
         time_format = settings.get("time_format", 24)
         prefix = ">" if self.selected_item == 0 else " "
-        self.display.draw_text((10, y), f"{prefix} Time: {time_format}h", 'small')
+        items.append(((10, y), f"{prefix} Time: {time_format}h", 'small'))
         y += line_height
         
         # Brightness
         brightness = settings.get("brightness", 3)
         prefix = ">" if self.selected_item == 1 else " "
-        bars = "■" * brightness + "□" * (5 - brightness)
-        self.display.draw_text((10, y), f"{prefix} Bright: {bars}", 'small')
+        bars = _BRIGHTNESS_BARS[min(max(brightness, 0), 5)]
+        items.append(((10, y), f"{prefix} Bright: {bars}", 'small'))
         y += line_height
         
         # Refresh mode
         refresh = settings.get("refresh_mode", "balanced")
         prefix = ">" if self.selected_item == 2 else " "
-        self.display.draw_text((10, y), f"{prefix} Refresh: {refresh}", 'small')
+        items.append(((10, y), f"{prefix} Refresh: {refresh}", 'small'))
         y += line_height
         
         # Device info
         y += 10
-        self.display.draw_text((10, y), f"Device: {Config.DEVICE_NAME}", 'small')
-        
-        # Button hints - left=prev item, middle=menu, right=change value
-        self.display.draw_text((3, 110), "[<Prev]", 'small')
-        self.display.draw_text((88, 110), "[Menu>]", 'small')
-        self.display.draw_text((190, 110), "[Change]", 'small')
+        items.append(((10, y), f"Device: {Config.DEVICE_NAME}", 'small'))
         
+        self.display.draw_text_batch(items)
         self.display.display(use_partial=use_partial)
     
     def on_return(self):
@@ -573,6 +762,7 @@ class SettingsMenu(Menu):
         if self.selected_item == 0:  # Time format
             current = settings.get("time_format", 24)
             settings.set("time_format", 12 if current == 24 else 24)
+            self.invalidate_time_format()
         
         elif self.selected_item == 1:  # Brightness
             current = settings.get("brightness", 3)
@@ -587,6 +777,13 @@ class SettingsMenu(Menu):
         self.render()
 
 
+class _State(IntEnum):
+    """What the menu state machine is busy with"""
+    IDLE = 0
+    RENDERING = 1       # A render or button action is drawing
+    TRANSITIONING = 2   # Switching menus (blocks animation updates too)
+
+
 class MenuStateMachine:
     """Manages menu navigation and state (simplified - single-threaded)"""
     
@@ -598,12 +795,21 @@ class MenuStateMachine:
             StatsMenu(display),
             SettingsMenu(display),
         ]
+        
+        # Bound handlers per menu index, built once
+        self._returns = [menu.on_return for menu in self.menus]
+        self._gos = [menu.on_go for menu in self.menus]
+        self._renders = [menu.render for menu in self.menus]
+        self._full_renders = [self._full_render_for(menu) for menu in self.menus]
+        self._region_updaters = [getattr(menu, 'region_updaters', None) for menu in self.menus]
+        self._dirty_updaters = [getattr(menu, 'update_dirty', None) for menu in self.menus]
+        
         self.current_menu_index = 0
         self.needs_render = True
+        self._render_regions = set()  # Regions waiting for a partial update
         
-        # Rendering state
-        self._rendering = False
-        self._in_transition = False  # Prevents updates during menu changes
+        # Rendering state (one field instead of separate busy flags)
+        self._state = _State.IDLE
         
         # Button press throttling
         self._last_button_press = 0
@@ -620,11 +826,24 @@ class MenuStateMachine:
     
     def is_in_transition(self) -> bool:
         """Check if menu is currently transitioning (prevents animation updates)"""
-        return self._in_transition or self._rendering
+        return self._state is not _State.IDLE
+    
+    def _try_enter(self, state: _State) -> bool:
+        """Move from IDLE to state, False if a render/transition is in progress"""
+        if self._state is not _State.IDLE:
+            if Config.DEBUG_MODE:
+                print(f"{self._state.name.capitalize()} in progress, ignoring request")
+            return False
+        self._state = state
+        return True
+    
+    def _exit(self):
+        """Return to IDLE after a render/transition"""
+        self._state = _State.IDLE
     
     def _can_process_button(self) -> bool:
         """Check if enough time has passed since last button press"""
-        now = time.time()
+        now = time.monotonic()  # Immune to NTP/wall clock steps
         if now - self._last_button_press < self._min_button_interval:
             if Config.DEBUG_MODE:
                 print(f"Button press throttled (too fast)")
@@ -632,6 +851,17 @@ class MenuStateMachine:
         self._last_button_press = now
         return True
     
+    @staticmethod
+    def _full_render_for(menu: Menu):
+        """Get the call that renders a menu with a full refresh (clears ghosting)"""
+        if hasattr(menu, 'render_full'):
+            return menu.render_full
+        # Check if render accepts use_partial parameter
+        import inspect
+        if 'use_partial' in inspect.signature(menu.render).parameters:
+            return lambda: menu.render(use_partial=False)
+        return menu.render
+    
     def _safe_render(self, menu_func):
         """Safely render a menu with error recovery"""
         try:
@@ -647,26 +877,19 @@ class MenuStateMachine:
                 self.current_menu_index = 0
                 self._render_failures = 0
                 try:
-                    self.menus[0].render()
+                    self._renders[0]()
                 except Exception as e2:
                     print(f"Fatal: Cannot render main menu: {e2}")
             return False
     
     def next_menu(self):
         """Switch to next menu (simplified - runs in main thread)"""
-        # Check if already rendering or transitioning
-        if self._rendering or self._in_transition:
-            if Config.DEBUG_MODE:
-                print("Render/transition in progress, skipping menu switch")
-            return
-        
-        # Throttle button presses
-        if not self._can_process_button():
+        # Skip if already rendering/transitioning, throttle button presses
+        if self.is_in_transition() or not self._can_process_button():
             return
         
         # Mark as transitioning
-        self._in_transition = True
-        self._rendering = True
+        self._state = _State.TRANSITIONING
         
         try:
             old_menu_index = self.current_menu_index
@@ -679,53 +902,30 @@ class MenuStateMachine:
                     menu.base_image_set = False
             
             # Render the menu - ALWAYS use full refresh to prevent ghosting
+            # (main menu also sets up its base image for partial updates)
             if self.needs_render:
-                if self.current_menu_index == 0 and hasattr(self.current_menu, 'render_full'):
-                    # Going to main menu - set up for partial updates
-                    self._safe_render(self.current_menu.render_full)
-                else:
-                    # Other menus - ALWAYS use full refresh to clear ghosting
-                    if hasattr(self.current_menu, 'render'):
-                        # Check if render accepts use_partial parameter
-                        import inspect
-                        sig = inspect.signature(self.current_menu.render)
-                        if 'use_partial' in sig.parameters:
-                            # Force full refresh (use_partial=False)
-                            self._safe_render(lambda: self.current_menu.render(use_partial=False))
-                        else:
-                            # Fallback to regular render if parameter not supported
-                            self._safe_render(self.current_menu.render)
-                    else:
-                        self._safe_render(self.current_menu.render)
+                self._safe_render(self._full_renders[self.current_menu_index])
                 self.needs_render = False
             
         finally:
-            self._rendering = False
-            self._in_transition = False
+            self._exit()
     
     def handle_return(self):
         """Handle RETURN button (simplified - runs in main thread)"""
-        # Check if already processing
-        if self._rendering or self._in_transition:
-            if Config.DEBUG_MODE:
-                print("Render/transition in progress, ignoring button press")
-            return
-        
-        # Throttle button presses
-        if not self._can_process_button():
+        # Skip if already processing, throttle button presses
+        if self.is_in_transition() or not self._can_process_button():
             return
         
         if self.current_menu_index == 0:
             # On main menu, RETURN feeds pet - no transition needed
-            self._rendering = True
+            self._state = _State.RENDERING
             try:
-                self.current_menu.on_return()
+                self._returns[0]()
             finally:
-                self._rendering = False
+                self._exit()
         else:
             # On other menus, RETURN goes back to main
-            self._in_transition = True
-            self._rendering = True
+            self._state = _State.TRANSITIONING
             
             try:
                 self.current_menu_index = 0
@@ -738,15 +938,11 @@ class MenuStateMachine:
                 
                 if self.needs_render:
                     # Use full render when going back to main menu (always full for main)
-                    if hasattr(self.current_menu, 'render_full'):
-                        self._safe_render(self.current_menu.render_full)
-                    else:
-                        self._safe_render(self.current_menu.render)
+                    self._safe_render(self._full_renders[0])
                     self.needs_render = False
                     
             finally:
-                self._rendering = False
-                self._in_transition = False
+                self._exit()
     
     def handle_action(self):
         """Handle ACTION button (switch menu) with thread safety"""
@@ -754,46 +950,64 @@ class MenuStateMachine:
     
     def handle_go(self):
         """Handle GO button (simplified - runs in main thread)"""
-        if self._rendering:
-            if Config.DEBUG_MODE:
-                print("Render in progress, ignoring button press")
-            return
-        
-        if not self._can_process_button():
+        if self.is_in_transition() or not self._can_process_button():
             return
         
-        self._rendering = True
+        self._state = _State.RENDERING
         try:
-            self.current_menu.on_go()
+            self._gos[self.current_menu_index]()
         finally:
-            self._rendering = False
+            self._exit()
     
     def render_current(self):
-        """Render current menu if needed (simplified - runs in main thread)"""
-        if self.needs_render and not self._rendering:
-            self._rendering = True
-            try:
-                self._safe_render(self.current_menu.render)
+        """Render current menu if needed (simplified - runs in main thread)
+        
+        Requests made since the last call are coalesced: one full render if
+        any asked for it, else one partial update for all requested regions
+        (one per region on menus without update_dirty).
+        """
+        if not (self.needs_render or self._render_regions) or not self._try_enter(_State.RENDERING):
+            return
+        
+        regions = self._render_regions
+        self._render_regions = set()
+        updaters = self._region_updaters[self.current_menu_index]
+        
+        try:
+            if self.needs_render or updaters is None or not regions <= updaters.keys():
+                self._safe_render(self._renders[self.current_menu_index])
                 self.needs_render = False
-            finally:
-                self._rendering = False
+            else:
+                update_dirty = self._dirty_updaters[self.current_menu_index]
+                if update_dirty is not None:
+                    self._safe_render(lambda: update_dirty(regions))
+                else:
+                    for region in regions:
+                        self._safe_render(updaters[region])
+        finally:
+            self._exit()
     
-    def request_render(self):
-        """Mark that a render is needed"""
-        self.needs_render = True
+    def request_render(self, region: Optional[str] = None):
+        """Mark that a render is needed
+        
+        Args:
+            region: Only this area changed ("time", "sprite" or "stats"),
+                None for a full render of the current menu
+        """
+        if region is None:
+            self.needs_render = True
+        else:
+            self._render_regions.add(region)
 
 
 if __name__ == "__main__":
     # Test menu rendering
-    from core.display import get_display
-    
     display = get_display()
     display.init()
     
     menu_system = MenuStateMachine(display)
     
     # Test each menu
-    import time
     for i in range(4):
         print(f"Rendering menu {i}")
         menu_system.render_current()
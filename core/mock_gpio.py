@@ -0,0 +1,46 @@
+"""
+Mock GPIO devices for E-Ink Pet Clock
+Used when no GPIO library is available (development/testing)
+"""
+
+
+class MockButton:
+    """Mock button for development/testing"""
+    __slots__ = ("pin", "_when_pressed", "_when_held", "_when_released", "hold_time", "supports_release")
+    
+    def __init__(self, pin, supports_release: bool = False):
+        self.pin = pin
+        self._when_pressed = None
+        self._when_held = None
+        self._when_released = None
+        self.hold_time = 2.0
+        self.supports_release = supports_release
+    
+    @property
+    def when_pressed(self):
+        return self._when_pressed
+    
+    @when_pressed.setter
+    def when_pressed(self, func):
+        self._when_pressed = func
+    
+    @property
+    def when_held(self):
+        return self._when_held
+    
+    @when_held.setter
+    def when_held(self, func):
+        self._when_held = func
+    
+    @property
+    def when_released(self):
+        return self._when_released
+    
+    @when_released.setter
+    def when_released(self, func):
+        if not self.supports_release:
+            raise AttributeError("MockButton created without release support")
+        self._when_released = func
+    
+    def close(self):
+        pass
@@ -2,46 +2,137 @@
 File-based state management for E-Ink Pet Clock
 Uses JSON files for persistent storage with atomic writes
 """
+import atexit
+import functools
 import json
+import os
+import struct
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from core.config import Config
 
+# orjson encodes/decodes several times faster (C), stdlib json is the fallback
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        """Compact JSON as bytes, like orjson.dumps()"""
+        return json.dumps(obj, separators=(',', ':')).encode()
+    _loads = json.loads
+
+# Longest message text shown as is on the display, longer ones are cut with "..."
+DISPLAY_TEXT_MAX = 20
+
+
+def display_text(message: str) -> str:
+    """Get the message text as shown in the messages menu"""
+    if len(message) > DISPLAY_TEXT_MAX:
+        return message[:DISPLAY_TEXT_MAX - 3] + "..."
+    return message
+
+
+def _now_iso(t: Optional[float] = None) -> str:
+    """UTC time t (default now) in ISO 8601, as datetime.isoformat() writes it"""
+    if t is None:
+        t = time.time()
+    seconds = int(t)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + ".%06d+00:00" % int((t - seconds) * 1000000)
+
+
+@functools.lru_cache(maxsize=8)
+def _iso_to_ns(text: str) -> int:
+    """ISO 8601 timestamp (UTC if it has no offset) to nanoseconds since the epoch"""
+    dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MICROSECOND * 1000
+
+
+def _ns_to_iso(ns: int) -> str:
+    """Nanoseconds since the epoch to the ISO 8601 form _now_iso() writes"""
+    seconds, rest = divmod(ns, 1000000000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + ".%06d+00:00" % (rest // 1000)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+# Seconds a change may stay in memory before flush() writes it to the SD card
+SAVE_DEBOUNCE = 2.0
+
 
 class StateManager:
-    """Base class for JSON-based state management with atomic writes"""
+    """Base class for file-based state management with atomic writes (JSON by default)"""
     
     def __init__(self, file_path: Path):
         self.file_path = file_path
+        self._path = str(file_path)
+        self._tmp_path = str(file_path.with_suffix('.tmp'))
         self._state: Dict[str, Any] = {}
+        self.version = 0  # Bumped on every change, lets readers skip re-reading
+        self._dirty = False  # Changed since the last save
+        self._last_save = 0.0  # time.monotonic() of the last save
         self._load()
+        self._changed()
     
     def _load(self):
         """Load state from file"""
         if self.file_path.exists():
             try:
-                with open(self.file_path, 'r') as f:
-                    self._state = json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
+                with open(self.file_path, 'rb') as f:
+                    self._state = self._decode(f.read())
+            except (ValueError, struct.error, OSError) as e:
                 print(f"Error loading {self.file_path}: {e}")
                 self._state = self._default_state()
         else:
+            # Written by the first flush() instead of before anything is shown
             self._state = self._default_state()
-            self._save()
+            self._dirty = True
     
-    def _save(self):
-        """Atomically save state to file using temp file + rename"""
-        tmp_path = self.file_path.with_suffix('.tmp')
+    def _encode(self) -> bytes:
+        """Serialize the state for the file"""
+        return _dumps(self._state)
+    
+    def _decode(self, data: bytes) -> Dict[str, Any]:
+        """Parse the file contents written by _encode()"""
+        return _loads(data)
+    
+    def _save(self, sync: bool = False):
+        """Atomically save state to file using temp file + rename
+        
+        Args:
+            sync: Also fsync the file and its directory, so the new state
+                survives a power cut
+        """
+        data = self._encode()
         try:
-            with open(tmp_path, 'w') as f:
-                json.dump(self._state, f, indent=2)
-            tmp_path.rename(self.file_path)
-        except IOError as e:
+            fd = os.open(self._tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, data)
+                if sync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(self._tmp_path, self._path)
+            if sync:
+                dir_fd = os.open(os.path.dirname(self._path), os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except OSError as e:
             print(f"Error saving {self.file_path}: {e}")
-            if tmp_path.exists():
-                tmp_path.unlink()
+            try:
+                os.unlink(self._tmp_path)
+            except FileNotFoundError:
+                pass
     
     def _default_state(self) -> Dict[str, Any]:
         """Override in subclass to provide default state"""
@@ -52,14 +143,37 @@ class StateManager:
         return self._state.get(key, default)
     
     def set(self, key: str, value: Any):
-        """Set value and save"""
-        self._state[key] = value
-        self._save()
+        """Set value (written by the next flush()), no-op if unchanged"""
+        state = self._state
+        if key in state and state[key] == value:
+            return
+        state[key] = value
+        self.version += 1
+        self._dirty = True
+        self._changed()
     
     def update(self, **kwargs):
-        """Update multiple values and save once"""
-        self._state.update(kwargs)
-        self._save()
+        """Update multiple values (written by the next flush()), no-op if none changed"""
+        state = self._state
+        changed = {k: v for k, v in kwargs.items() if k not in state or state[k] != v}
+        if not changed:
+            return
+        state.update(changed)
+        self.version += 1
+        self._dirty = True
+        self._changed()
+    
+    def _changed(self):
+        """Called after the state was loaded or changed, for derived values"""
+        pass
+    
+    def flush(self, force: bool = False):
+        """Save pending changes, at most once per SAVE_DEBOUNCE unless forced
+        
+        Forced flushes (shutdown, API actions) are also synced to the card.
+        """
+        if self._dirty and (force or time.monotonic() - self._last_save >= SAVE_DEBOUNCE):
+            self._save(sync=force)
     
     def to_dict(self) -> Dict[str, Any]:
         """Get state as dictionary"""
@@ -67,13 +181,55 @@ class StateManager:
 
 
 class PetState(StateManager):
-    """Manages pet (bunny) state"""
+    """Manages pet (bunny) state
+    
+    Stored as one fixed-size binary record (_PET_RECORD) rather than JSON,
+    it is the most frequently written file. Timestamps are kept as ISO
+    strings in memory and as nanoseconds on disk.
+    """
     
     def __init__(self):
-        super().__init__(Config.DATA_DIR / "pet_state.json")
+        self._last_update_ns = 0  # last_update in ns since the epoch, set by _changed()
+        super().__init__(Config.DATA_DIR / "pet_state.bin")
+    
+    def _load(self):
+        """Load state, migrating a pet_state.json from older versions once"""
+        legacy_path = self.file_path.with_suffix(".json")
+        if not self.file_path.exists() and legacy_path.exists():
+            try:
+                with open(legacy_path, 'rb') as f:
+                    self._state = {**self._default_state(), **_loads(f.read())}
+                self._save(sync=True)
+                print(f"✓ Migrated {legacy_path.name} to {self.file_path.name}")
+                return
+            except (ValueError, OSError) as e:
+                print(f"Error migrating {legacy_path}: {e}")
+        super()._load()
+    
+    def _encode(self) -> bytes:
+        state = self._state
+        return _PET_RECORD.pack(
+            _PET_MAGIC,
+            *(state[key] for key in _PET_INT_FIELDS),
+            *(_iso_to_ns(state[key]) for key in _PET_TIME_FIELDS),
+            state["name"].encode(),
+            state["type"].encode(),
+        )
+    
+    def _decode(self, data: bytes) -> Dict[str, Any]:
+        values = _PET_RECORD.unpack(data)
+        if values[0] != _PET_MAGIC:
+            raise ValueError("not a pet state record")
+        ints_end = 1 + len(_PET_INT_FIELDS)
+        times_end = ints_end + len(_PET_TIME_FIELDS)
+        state = dict(zip(_PET_INT_FIELDS, values[1:ints_end]))
+        state.update(zip(_PET_TIME_FIELDS, map(_ns_to_iso, values[ints_end:times_end])))
+        state["name"] = values[times_end].rstrip(b"\0").decode(errors="ignore")
+        state["type"] = values[times_end + 1].rstrip(b"\0").decode(errors="ignore")
+        return state
     
     def _default_state(self) -> Dict[str, Any]:
-        now = datetime.now(timezone.utc).isoformat()
+        now = _now_iso()
         return {
             "name": Config.PET_NAME,
             "type": Config.PET_TYPE,
@@ -109,29 +265,30 @@ class PetState(StateManager):
     
     def feed(self):
         """Feed the pet"""
-        now = datetime.now(timezone.utc).isoformat()
+        state = self._state
+        now = _now_iso()
         self.update(
-            hunger=max(0, self.hunger - 3),
-            happiness=min(Config.MAX_HAPPINESS, self.happiness + 1),
+            hunger=max(0, state["hunger"] - 3),
+            happiness=min(Config.MAX_HAPPINESS, state["happiness"] + 1),
             last_fed=now,
             last_interaction=now,
-            total_feeds=self._state["total_feeds"] + 1
+            total_feeds=state["total_feeds"] + 1
         )
     
     def interact(self):
         """Interact with pet (poke, pet, etc.)"""
-        now = datetime.now(timezone.utc).isoformat()
+        state = self._state
         self.update(
-            happiness=min(Config.MAX_HAPPINESS, self.happiness + 2),
-            last_interaction=now,
-            total_interactions=self._state["total_interactions"] + 1
+            happiness=min(Config.MAX_HAPPINESS, state["happiness"] + 2),
+            last_interaction=_now_iso(),
+            total_interactions=state["total_interactions"] + 1
         )
     
     def message_sent(self):
         """Record that a message was sent"""
         self.update(
             messages_sent=self._state["messages_sent"] + 1,
-            last_interaction=datetime.now(timezone.utc).isoformat()
+            last_interaction=_now_iso()
         )
     
     def message_received(self):
@@ -142,12 +299,12 @@ class PetState(StateManager):
     
     def update_state(self):
         """Update pet state based on time decay"""
-        now = datetime.now(timezone.utc)
-        last_update = datetime.fromisoformat(self._state["last_update"])
-        hours_passed = (now - last_update).total_seconds() / 3600
+        now_ns = time.time_ns()
+        elapsed_ns = now_ns - self._last_update_ns
         
-        if hours_passed < 0.1:  # Less than 6 minutes, skip
+        if elapsed_ns < _UPDATE_MIN_NS:  # Less than 6 minutes, skip
             return
+        hours_passed = elapsed_ns / 3.6e12
         
         # Calculate decay
         hunger_increase = int(hours_passed * Config.HUNGER_DECAY_RATE)
@@ -165,6 +322,11 @@ class PetState(StateManager):
         else:
             new_health = self.health
         
+        # Nothing to show yet: keep last_update so the partial hour carries over
+        if (new_hunger == self.hunger and new_happiness == self.happiness
+                and new_health == self.health and int(hours_passed) == 0):
+            return
+        
         # Update age
         new_age_hours = self.age_hours + int(hours_passed)
         
@@ -173,143 +335,216 @@ class PetState(StateManager):
             happiness=new_happiness,
             health=new_health,
             age_hours=new_age_hours,
-            last_update=now.isoformat()
+            last_update=_ns_to_iso(now_ns)
         )
     
-    def get_mood(self) -> str:
-        """Get pet mood based on stats"""
-        if self.health <= 3:
-            return "sick"
-        elif self.hunger >= 7:
-            return "hungry"
-        elif self.happiness >= 8:
-            return "happy"
-        elif self.happiness <= 3:
-            return "sad"
+    def _changed(self):
+        """Recompute the mood and last_update timestamp from the current state"""
+        state = self._state
+        self._last_update_ns = _iso_to_ns(state["last_update"])
+        health, hunger, happiness = state["health"], state["hunger"], state["happiness"]
+        if health <= 3:
+            self._mood = "sick"
+        elif hunger >= 7:
+            self._mood = "hungry"
+        elif happiness >= 8:
+            self._mood = "happy"
+        elif happiness <= 3:
+            self._mood = "sad"
         else:
-            return "neutral"
+            self._mood = "neutral"
+    
+    def get_mood(self) -> str:
+        """Get pet mood based on stats (computed when they change)"""
+        return self._mood
+
+
+# pet_state.bin layout: magic, counters (int32), timestamps (int64 ns since
+# the epoch), then name and type as NUL-padded UTF-8 (longer ones are cut)
+_PET_MAGIC = b"PET1"
+_PET_INT_FIELDS = (
+    "hunger", "happiness", "health", "age_hours",
+    "total_feeds", "total_interactions", "messages_sent", "messages_received",
+)
+_PET_TIME_FIELDS = ("last_fed", "last_interaction", "last_update", "created_at")
+_PET_RECORD = struct.Struct("<4s8i4q32s16s")
+
+# update_state() does nothing until this much time passed since last_update
+_UPDATE_MIN_NS = 6 * 60 * 1000000000
 
 
 class MessageLog:
-    """Manages message log using JSONL (JSON Lines) format"""
+    """Manages message log using JSONL (JSON Lines) format
+    
+    The file is append-only: besides messages it holds op records
+    ({"op": "read_all"} and {"op": "del", "id": ...}) that are folded in on
+    read, and it is rewritten only when it has doubled since the last
+    compaction.
+    """
     
     def __init__(self):
         self.file_path = Config.DATA_DIR / "messages.jsonl"
         self.max_messages = 50
+        self._compact_size = 0  # File size that triggers the next compaction
+        
+        # All folded messages in the file, valid while it still has _cache_version
+        self._cache: List[Dict[str, Any]] = []
+        self._cache_version = None
+        
+        self._last_id = None  # Newest message id, read from the log on first add
+    
+    @property
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever the log file is written, also by the API service"""
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (st.st_mtime_ns, st.st_size)
     
     def add_message(self, from_device: str, message: str, msg_type: str = "text"):
         """Add a new message to the log"""
+        # ID based on timestamp (ms), bumped past the newest message so
+        # messages added in the same millisecond stay unique
+        if self._last_id is None:
+            messages = self._load_messages()
+            self._last_id = messages[-1].get("id", 0) if messages else 0
+        msg_id = max(time.time_ns() // 1000000, self._last_id + 1)
+        self._last_id = msg_id
+        
         entry = {
-            "id": int(datetime.now(timezone.utc).timestamp() * 1000),  # Unique ID based on timestamp
+            "id": msg_id,
             "from": from_device,
             "message": message,
+            "display": display_text(message),  # Truncated once, not per render
             "type": msg_type,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": _now_iso(),
             "read": False
         }
-        
-        # Append to file
-        with open(self.file_path, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
-        
-        # Trim if too many messages
-        self._trim_if_needed()
+        self._append(entry)
     
     def get_messages(self, limit: int = 20, unread_only: bool = False) -> List[Dict[str, Any]]:
         """Get recent messages"""
-        if not self.file_path.exists():
-            return []
-        
-        messages = []
-        with open(self.file_path, 'r') as f:
-            for line in f:
-                try:
-                    msg = json.loads(line.strip())
-                    if not unread_only or not msg.get("read", False):
-                        messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
+        messages = self._load_messages()
+        if unread_only:
+            messages = [msg for msg in messages if not msg.get("read", False)]
         
         # Return most recent first
-        messages.reverse()
-        return messages[:limit]
+        return messages[::-1][:limit]
     
     def mark_all_read(self):
         """Mark all messages as read"""
         if not self.file_path.exists():
             return
-        
-        messages = []
-        with open(self.file_path, 'r') as f:
-            for line in f:
-                try:
-                    msg = json.loads(line.strip())
-                    msg["read"] = True
-                    messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Rewrite file
-        with open(self.file_path, 'w') as f:
-            for msg in messages:
-                f.write(json.dumps(msg) + '\n')
+        self._append({"op": "read_all"})
+    
+    def count(self) -> int:
+        """Get the number of stored messages"""
+        return len(self._load_messages())
     
     def get_unread_count(self) -> int:
         """Get count of unread messages"""
-        return len(self.get_messages(unread_only=True))
+        return sum(1 for msg in self._load_messages() if not msg.get("read", False))
     
     def delete_message(self, msg_id: int):
         """Delete a message by ID"""
         if not self.file_path.exists():
             return
-        
-        messages = []
-        with open(self.file_path, 'r') as f:
-            for line in f:
-                try:
-                    msg = json.loads(line.strip())
-                    # Keep messages that don't match the ID
-                    if msg.get("id") != msg_id:
-                        messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Rewrite file without the deleted message
-        with open(self.file_path, 'w') as f:
-            for msg in messages:
-                f.write(json.dumps(msg) + '\n')
+        self._append({"op": "del", "id": msg_id})
     
     def delete_most_recent(self):
         """Delete the most recent message"""
-        if not self.file_path.exists():
-            return
+        messages = self._load_messages()
+        if messages:
+            self._append({"op": "del", "id": messages[-1].get("id")})
+    
+    def _read_records(self) -> List[Dict[str, Any]]:
+        """Parse every record in the file (messages and ops), oldest first"""
+        try:
+            with open(self.file_path, 'rb') as f:
+                # One read and split instead of iterating lines
+                lines = f.read().split(b'\n')
+        except FileNotFoundError:
+            return []
         
+        records = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                records.append(_loads(line))
+            except ValueError:
+                continue
+        return records
+    
+    def _load_messages(self) -> List[Dict[str, Any]]:
+        """The messages left after applying every op, oldest first
+        
+        The file is only re-read when another process changed it (our own
+        appends are folded into the cache), so repeated reads cost one stat().
+        The last max_messages are returned, do not modify the dicts.
+        """
+        version = self.version
+        if version != self._cache_version:
+            self._cache = self._apply_ops(self._read_records())
+            self._cache_version = version
+        return self._cache[-self.max_messages:]
+    
+    @classmethod
+    def _apply_ops(cls, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold op records into the messages written before them"""
         messages = []
-        with open(self.file_path, 'r') as f:
-            for line in f:
-                try:
-                    msg = json.loads(line.strip())
-                    messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
+        for record in records:
+            cls._apply_record(messages, record)
+        return messages
+    
+    @staticmethod
+    def _apply_record(messages: List[Dict[str, Any]], record: Dict[str, Any]):
+        """Fold one record (message or op) into messages, in place"""
+        op = record.get("op")
+        if op is None:
+            messages.append(record)
+        elif op == "read_all":
+            for msg in messages:
+                msg["read"] = True
+        elif op == "del":
+            # Newest match only, logs from older versions may repeat ids
+            msg_id = record.get("id")
+            for i in range(len(messages) - 1, -1, -1):
+                if messages[i].get("id") == msg_id:
+                    del messages[i]
+                    break
+    
+    def _append(self, record: Dict[str, Any]):
+        """Append one record, compacting the file once it has grown enough"""
+        data = _dumps(record) + b'\n'
+        before = self.version
+        with open(self.file_path, 'ab') as f:
+            f.write(data)
+        after = self.version
         
-        if messages:
-            # Remove the last message (most recent)
-            messages.pop()
-            
-            # Rewrite file
-            with open(self.file_path, 'w') as f:
-                for msg in messages:
-                    f.write(json.dumps(msg) + '\n')
-    
-    def _trim_if_needed(self):
-        """Keep only the most recent N messages"""
-        messages = self.get_messages(limit=self.max_messages)
-        if len(messages) >= self.max_messages:
-            messages = messages[:self.max_messages]
-            with open(self.file_path, 'w') as f:
-                for msg in reversed(messages):  # Reverse back to chronological
-                    f.write(json.dumps(msg) + '\n')
+        # Nobody else wrote in between: fold the record in instead of re-reading
+        if self._cache_version == before and after[1] == before[1] + len(data):
+            self._apply_record(self._cache, record)
+            self._cache_version = after
+        
+        if after[1] > self._compact_size:
+            self._compact()
+    
+    def _compact(self):
+        """Rewrite the file as just the last max_messages messages"""
+        messages = self._load_messages()
+        tmp_path = self.file_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(_dumps(msg) + b'\n' for msg in messages))
+        tmp_path.replace(self.file_path)
+        
+        # The file now holds exactly these messages
+        self._cache = messages
+        self._cache_version = self.version
+        
+        # Ops and new messages may double the file before the next rewrite
+        self._compact_size = 2 * max(self._cache_version[1], 4096)
 
 
 class UserSettings(StateManager):
@@ -327,7 +562,7 @@ class UserSettings(StateManager):
             "wake_time": "07:00",
             "refresh_mode": "balanced",  # fast, balanced, slow
             "notifications_enabled": True,
-            "last_modified": datetime.now(timezone.utc).isoformat()
+            "last_modified": _now_iso()
         }
 
 
@@ -339,7 +574,7 @@ class Stats(StateManager):
     
     def _default_state(self) -> Dict[str, Any]:
         return {
-            "first_boot": datetime.now(timezone.utc).isoformat(),
+            "first_boot": _now_iso(),
             "total_uptime_hours": 0,
             "total_button_presses": 0,
             "total_display_updates": 0,
@@ -352,8 +587,12 @@ class Stats(StateManager):
     
     def increment(self, key: str, amount: int = 1):
         """Increment a counter"""
-        current = self._state.get(key, 0)
-        self.set(key, current + amount)
+        self.batch_increment(**{key: amount})
+    
+    def batch_increment(self, **deltas: int):
+        """Increment several counters with a single update"""
+        state = self._state
+        self.update(**{key: state.get(key, 0) + amount for key, amount in deltas.items()})
     
     def record_error(self, error_message: str):
         """Record an error"""
@@ -361,48 +600,87 @@ class Stats(StateManager):
             network_errors=self._state.get("network_errors", 0) + 1,
             last_error={
                 "message": error_message,
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": _now_iso()
             }
         )
 
 
-# Singleton instances
-_pet_state: Optional[PetState] = None
-_message_log: Optional[MessageLog] = None
-_settings: Optional[UserSettings] = None
-_stats: Optional[Stats] = None
+# Singleton instances: `from core.state import pet_state` (message_log,
+# settings, stats) creates them on first import (PEP 562), after which they
+# are plain module globals
+
+
+def __getattr__(name):
+    getter = _GETTERS.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getter()
+
+
+# Bound on first use by _create(); until then, only annotated
+pet_state: "PetState"
+message_log: "MessageLog"
+settings: "UserSettings"
+stats: "Stats"
+
+
+def _create(name: str, cls):
+    """Create a singleton and bind it as a module global"""
+    instance = globals()[name] = cls()
+    return instance
 
 
 def get_pet_state() -> PetState:
     """Get pet state singleton"""
-    global _pet_state
-    if _pet_state is None:
-        _pet_state = PetState()
-    return _pet_state
+    try:
+        return pet_state
+    except NameError:
+        return _create("pet_state", PetState)
 
 
 def get_message_log() -> MessageLog:
     """Get message log singleton"""
-    global _message_log
-    if _message_log is None:
-        _message_log = MessageLog()
-    return _message_log
+    try:
+        return message_log
+    except NameError:
+        return _create("message_log", MessageLog)
 
 
 def get_settings() -> UserSettings:
     """Get settings singleton"""
-    global _settings
-    if _settings is None:
-        _settings = UserSettings()
-    return _settings
+    try:
+        return settings
+    except NameError:
+        return _create("settings", UserSettings)
 
 
 def get_stats() -> Stats:
     """Get stats singleton"""
-    global _stats
-    if _stats is None:
-        _stats = Stats()
-    return _stats
+    try:
+        return stats
+    except NameError:
+        return _create("stats", Stats)
+
+
+_GETTERS = {
+    "pet_state": get_pet_state,
+    "message_log": get_message_log,
+    "settings": get_settings,
+    "stats": get_stats,
+}
+
+
+def flush_all(force: bool = False):
+    """Save pending changes of every loaded state file"""
+    module_globals = globals()
+    for name in ("pet_state", "settings", "stats"):
+        state = module_globals.get(name)
+        if state is not None:
+            state.flush(force)
+
+
+# Never lose changes still waiting for the debounce on exit
+atexit.register(flush_all, True)
 
 
 if __name__ == "__main__":
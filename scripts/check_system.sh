@@ -56,7 +56,7 @@ check_pip_package() {
 
 check_pip_package "dotenv"
 check_pip_package "PIL"
-check_pip_package "pytz"
+check_pip_package "zoneinfo"
 check_pip_package "waveshare_epd"
 check_pip_package "RPi.GPIO"
 echo ""
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compile .env into core/config_compiled.py for faster startup
+Run on the device after editing .env; delete the output to go back to .env
+"""
+import sys
+from pathlib import Path
+from dotenv import dotenv_values
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+ENV_PATH = PROJECT_ROOT / ".env"
+OUTPUT_PATH = PROJECT_ROOT / "core" / "config_compiled.py"
+
+
+def compile_config(env_path: Path = ENV_PATH, output_path: Path = OUTPUT_PATH) -> int:
+    """Write every .env entry as a string literal, returns the number of keys"""
+    values = dotenv_values(env_path)
+    
+    lines = [
+        f'"""Generated from {env_path.name} by scripts/compile_config.py - do not edit"""',
+    ]
+    for key, value in values.items():
+        if not key.isidentifier() or value is None:
+            print(f"⚠ Skipping {key!r}")
+            continue
+        lines.append(f"{key} = {value!r}")
+    
+    # Write to a temp file and rename so a running service never reads half a file
+    tmp_path = output_path.with_suffix(".tmp")
+    tmp_path.write_text("\n".join(lines) + "\n")
+    tmp_path.replace(output_path)
+    return len(lines) - 1
+
+
+def main():
+    if not ENV_PATH.is_file():
+        print(f"Error: .env file not found at {ENV_PATH}")
+        sys.exit(1)
+    
+    count = compile_config()
+    print(f"✓ Compiled {count} settings to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ for e-ink display usage
 """
 from PIL import Image
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Paths
@@ -58,23 +59,33 @@ SPRITE_CONFIGS = {
 }
 
 
+# Threshold -> 256-entry lookup table for Image.point(), built once per threshold
+_THRESHOLD_LUTS = {}
+
+
 def convert_to_bw_threshold(img, threshold=128):
     """Convert image to pure black and white using threshold"""
-    # Convert to grayscale
-    gray = img.convert('L')
+    # Convert to grayscale (frames cut from a grayscale sheet already are)
+    gray = img if img.mode == 'L' else img.convert('L')
     
     # Apply threshold: pixels above threshold become white, below become black
-    bw = gray.point(lambda x: 255 if x > threshold else 0, mode='1')
+    lut = _THRESHOLD_LUTS.get(threshold)
+    if lut is None:
+        lut = _THRESHOLD_LUTS[threshold] = [255 if x > threshold else 0 for x in range(256)]
+    bw = gray.point(lut, mode='1')
     
     return bw
 
 
-def extract_sprite_frames(sprite_sheet_path, num_frames, sprite_width=32, sprite_height=32):
+def extract_sprite_frames(sprite_sheet_path, num_frames, sprite_width=32, sprite_height=32, mode=None):
     """
     Extract individual frames from a sprite sheet
     Assumes sprites are arranged horizontally in a single row
+    The whole sheet is converted to mode (if given) before cropping
     """
     img = Image.open(sprite_sheet_path)
+    if mode is not None:
+        img = img.convert(mode)
     
     frames = []
     for i in range(num_frames):
@@ -102,13 +113,16 @@ def process_sprite_sheet(sheet_name, config):
     print(f"\n📄 Processing {sheet_name}")
     print(f"   Frames: {config['frames']}")
     
-    # Extract frames
-    frames = extract_sprite_frames(source_path, config['frames'])
+    # Extract grayscale frames (one conversion for the whole sheet)
+    frames = extract_sprite_frames(source_path, config['frames'], mode='L')
     
     # Convert each frame to B&W and save
+    bw_first = None
     for i, frame in enumerate(frames):
         # Convert to black and white
         bw_frame = convert_to_bw_threshold(frame, threshold=200)
+        if i == 0:
+            bw_first = bw_frame
         
         # Generate output filename
         if config['frames'] == 1:
@@ -123,13 +137,17 @@ def process_sprite_sheet(sheet_name, config):
         print(f"   ✓ Saved {output_name}")
     
     # Also save the first frame as the main sprite for this mood
-    if config['frames'] > 0:
+    if bw_first is not None:
         main_output = OUTPUT_DIR / f"{config['mood']}.png"
-        bw_frame = convert_to_bw_threshold(frames[0], threshold=200)
-        bw_frame.save(main_output)
+        bw_first.save(main_output)
         print(f"   ✓ Saved {config['mood']}.png (main sprite)")
 
 
+def _process_item(item):
+    """Worker: process one (sheet_name, config) pair"""
+    process_sprite_sheet(*item)
+
+
 def main():
     """Convert all sprite sheets"""
     print("=" * 60)
@@ -141,9 +159,13 @@ def main():
     print(f"\n📁 Source: {SOURCE_DIR}")
     print(f"📁 Output: {OUTPUT_DIR}")
     
-    # Process each sprite sheet
-    for sheet_name, config in SPRITE_CONFIGS.items():
-        process_sprite_sheet(sheet_name, config)
+    # Process the sprite sheets (independent, so in parallel when there are enough)
+    if len(SPRITE_CONFIGS) >= 4:
+        with ProcessPoolExecutor() as executor:
+            list(executor.map(_process_item, SPRITE_CONFIGS.items()))
+    else:
+        for item in SPRITE_CONFIGS.items():
+            _process_item(item)
     
     print("\n" + "=" * 60)
     print("✓ Conversion complete!")
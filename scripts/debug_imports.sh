@@ -8,8 +8,8 @@ echo -e "\n=== Checking Required Packages ==="
 echo -n "dotenv: "
 python3 -c 'import dotenv; print("OK")' 2>&1 || echo "MISSING"
 
-echo -n "pytz: "
-python3 -c 'import pytz; print("OK")' 2>&1 || echo "MISSING"
+echo -n "zoneinfo: "
+python3 -c 'from zoneinfo import ZoneInfo; ZoneInfo("UTC"); print("OK")' 2>&1 || echo "MISSING"
 
 echo -n "PIL: "
 python3 -c 'from PIL import Image; print("OK")' 2>&1 || echo "MISSING"
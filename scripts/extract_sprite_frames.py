@@ -4,6 +4,7 @@ Extract individual frames from sprite sheets
 Properly splits sprite sheets every 32 pixels horizontally
 """
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Paths
@@ -61,9 +62,9 @@ def extract_frames(sheet_path: Path, num_frames: int, output_name: str):
             if frame.mode != 'RGBA':
                 frame = frame.convert('RGBA')
             
-            # Check if frame has any opaque pixels
-            pixels = frame.getdata()
-            has_content = any(pixel[3] > 0 for pixel in pixels)
+            # Check if frame has any opaque pixels (bounding box of the
+            # alpha channel, computed in C)
+            has_content = frame.getchannel('A').getbbox() is not None
             
             if has_content:
                 # Save the frame
@@ -82,6 +83,18 @@ def extract_frames(sheet_path: Path, num_frames: int, output_name: str):
         return 0
 
 
+def _extract_sheet(sheet_filename: str) -> int:
+    """Worker: extract one sprite sheet, returns the number of frames saved"""
+    sheet_path = SOURCE_DIR / sheet_filename
+    
+    # Output name is the sheet name without "-Sheet.png"
+    output_name = sheet_filename.replace("-Sheet.png", "")
+    
+    extracted = extract_frames(sheet_path, SPRITE_SHEETS[sheet_filename], output_name)
+    print()
+    return extracted
+
+
 def main():
     print("=" * 50)
     print("Sprite Sheet Frame Extractor")
@@ -91,24 +104,21 @@ def main():
     # Ensure output directory exists
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    total_extracted = 0
-    total_expected = 0
-    
-    # Process each sprite sheet
-    for sheet_filename, num_frames in SPRITE_SHEETS.items():
-        sheet_path = SOURCE_DIR / sheet_filename
-        
-        if not sheet_path.exists():
+    # Sheets that exist
+    sheets = []
+    for sheet_filename in SPRITE_SHEETS:
+        if not (SOURCE_DIR / sheet_filename).exists():
             print(f"WARNING: {sheet_filename} not found, skipping")
             continue
-        
-        # Output name is the sheet name without "-Sheet.png"
-        output_name = sheet_filename.replace("-Sheet.png", "")
-        
-        extracted = extract_frames(sheet_path, num_frames, output_name)
-        total_extracted += extracted
-        total_expected += num_frames
-        print()
+        sheets.append(sheet_filename)
+    
+    # Process the sprite sheets (independent, so in parallel when there are enough)
+    if len(sheets) >= 4:
+        with ProcessPoolExecutor() as executor:
+            total_extracted = sum(executor.map(_extract_sheet, sheets))
+    else:
+        total_extracted = sum(map(_extract_sheet, sheets))
+    total_expected = sum(SPRITE_SHEETS[sheet_filename] for sheet_filename in sheets)
     
     print("=" * 50)
     print(f"Extraction complete!")
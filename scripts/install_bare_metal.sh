@@ -43,9 +43,10 @@ echo "=== Installing System Packages (No Compilation) ==="
 # List of required system packages
 PACKAGES=(
     "python3-dotenv"      # For .env file support
-    "python3-tz"          # For timezone support (pytz)
+    "tzdata"              # Timezone database (zoneinfo)
     "python3-pil"         # For image handling
-    "python3-gpiozero"    # For GPIO button handling (preferred)
+    "python3-libgpiod"    # For GPIO button handling (preferred, needs v2 bindings)
+    "python3-gpiozero"    # For GPIO button handling (fallback)
     "python3-rpi.gpio"    # For GPIO fallback
     "python3-fastapi"     # For API (if available)
     "python3-uvicorn"     # For API server (if available)
@@ -111,11 +112,12 @@ except ImportError:
     errors.append("dotenv")
 
 try:
-    import pytz
-    print("✓ pytz")
-except ImportError:
-    print("✗ pytz (REQUIRED)")
-    errors.append("pytz")
+    from zoneinfo import ZoneInfo
+    ZoneInfo("UTC")
+    print("✓ zoneinfo")
+except Exception:
+    print("✗ zoneinfo / tzdata (REQUIRED)")
+    errors.append("tzdata")
 
 try:
     from PIL import Image
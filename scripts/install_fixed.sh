@@ -47,7 +47,7 @@ check_package() {
 MISSING_PACKAGES=()
 
 check_package "python-dotenv" "dotenv" || MISSING_PACKAGES+=("python3-dotenv")
-check_package "pytz" "pytz" || MISSING_PACKAGES+=("python3-tz")
+check_package "tzdata" "zoneinfo" || MISSING_PACKAGES+=("tzdata")
 check_package "PIL" "PIL" || MISSING_PACKAGES+=("python3-pil")
 check_package "RPi.GPIO" "RPi.GPIO" || MISSING_PACKAGES+=("python3-rpi.gpio")
 
@@ -75,10 +75,10 @@ if ! python3 -c "import dotenv" 2>/dev/null; then
     sudo apt-get install -y python3-dotenv
 fi
 
-# Check and install pytz if needed
-if ! python3 -c "import pytz" 2>/dev/null; then
-    echo "Installing python3-tz (pytz)..."
-    sudo apt-get install -y python3-tz
+# Check the system timezone database (used by zoneinfo)
+if ! python3 -c "from zoneinfo import ZoneInfo; ZoneInfo('UTC')" 2>/dev/null; then
+    echo "Installing tzdata..."
+    sudo apt-get install -y tzdata
 fi
 
 # PIL should already be there, but check
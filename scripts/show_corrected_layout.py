@@ -2,8 +2,10 @@
 """
 CORRECTED layout with proper spacing
 """
+import sys
 
-print("""
+# Encoded once, written straight to the byte stream
+_BANNER = """
 ╔════════════════════════════════════════════════════════════╗
 ║         CORRECTED Vertical Layout (Proper Spacing)        ║
 ╚════════════════════════════════════════════════════════════╝
@@ -60,4 +62,8 @@ RESULT:
 ✓ Divider properly separates content from buttons
 ✓ Everything fits perfectly on screen
 
-""")
+
+""".encode()
+
+sys.stdout.buffer.write(_BANNER)
+sys.stdout.flush()
@@ -2,8 +2,10 @@
 """
 Final optimized layout with labels
 """
+import sys
 
-print("""
+# Encoded once, written straight to the byte stream
+_BANNER = """
 ╔════════════════════════════════════════════════════════════╗
 ║         Final E-Ink Pet Clock Layout (with labels)        ║
 ╚════════════════════════════════════════════════════════════╝
@@ -86,4 +88,8 @@ IMPROVEMENTS FROM PREVIOUS VERSION:
 ✓ Changed [Msg] to [Menu] - more accurate
 ✓ All content above divider - organized layout
 
-""")
+
+""".encode()
+
+sys.stdout.buffer.write(_BANNER)
+sys.stdout.flush()
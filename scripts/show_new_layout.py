@@ -2,8 +2,10 @@
 """
 Visual mockup of new clock-focused layout
 """
+import sys
 
-print("""
+# Encoded once, written straight to the byte stream
+_BANNER = """
 ╔══════════════════════════════════════════════════════════════╗
 ║              E-Ink Pet Clock - New Layout                    ║
 ╚══════════════════════════════════════════════════════════════╝
@@ -67,4 +69,8 @@ ADVANTAGES:
 4. Clean organization - All stats in dedicated bar
 5. Better use of horizontal space
 
-""")
+
+""".encode()
+
+sys.stdout.buffer.write(_BANNER)
+sys.stdout.flush()
@@ -2,8 +2,10 @@
 """
 Final layout with VERTICAL stats (multi-line) and regular font
 """
+import sys
 
-print("""
+# Encoded once, written straight to the byte stream
+_BANNER = """
 ╔════════════════════════════════════════════════════════════╗
 ║    Final E-Ink Pet Clock Layout (VERTICAL STATS)          ║
 ╚════════════════════════════════════════════════════════════╝
@@ -96,4 +98,8 @@ Mood:   :)
 
 Much cleaner and easier to read!
 
-""")
+
+""".encode()
+
+sys.stdout.buffer.write(_BANNER)
+sys.stdout.flush()
@@ -2,17 +2,34 @@
 """
 Test sending messages to the Pi's e-ink pet clock
 """
-import requests
 import sys
 
 PI_HOST = "relojdai.local"
 PI_PORT = 5001
 API_URL = f"http://{PI_HOST}:{PI_PORT}"
 
+# Shared session (one DNS lookup and connection for all requests), created on
+# first use since requests is slow to import
+_session = None
+
+def get_session():
+    """Get the shared requests session, retrying failed connections"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util import Retry
+        
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.2)))
+    return _session
+
 def send_message(message_text="Test message!", sender="Your Mac"):
     """Send a message to the Pi"""
+    import requests  # For the exception types, already loaded by get_session()
+    
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{API_URL}/poke",
             json={"message": message_text, "from": sender},
             timeout=5
@@ -39,7 +56,7 @@ def send_message(message_text="Test message!", sender="Your Mac"):
 def get_messages():
     """Get all messages from the Pi"""
     try:
-        response = requests.get(f"{API_URL}/messages", timeout=5)
+        response = get_session().get(f"{API_URL}/messages", timeout=5)
         if response.status_code == 200:
             messages = response.json()
             print(f"\n📬 Messages on Pi ({len(messages)} total):")
@@ -21,16 +21,28 @@ draw.text((10, 5), "Bunny Sprite Test", fill=0)
 
 # Test each mood sprite
 moods = ["neutral", "happy", "sad", "sick", "sleeping", "dead", "excited", "angry"]
-x_positions = [10, 70, 130, 190, 10, 70, 130, 190]
-y_positions = [25, 25, 25, 25, 70, 70, 70, 70]
 
-for mood, x, y in zip(moods, x_positions, y_positions):
+# Grid layout: cell (row, col) of mood i comes from divmod(i, COLS)
+COLS = 4
+CELL_W = 60
+CELL_H = 45
+ORIGIN = (10, 25)
+
+# Decode, resize to 28x28 for the grid view and convert to 1-bit once per mood
+SPRITE_ATLAS = {}
+for mood in moods:
     sprite_path = SPRITES_DIR / f"{mood}.png"
-    
     if sprite_path.exists():
-        sprite = Image.open(sprite_path)
-        # Resize to 28x28 for the grid view
-        sprite_small = sprite.resize((28, 28))
+        with Image.open(sprite_path) as sprite:
+            SPRITE_ATLAS[mood] = sprite.resize((28, 28)).convert('1')
+
+for i, mood in enumerate(moods):
+    row, col = divmod(i, COLS)
+    x = ORIGIN[0] + col * CELL_W
+    y = ORIGIN[1] + row * CELL_H
+    sprite_small = SPRITE_ATLAS.get(mood)
+    
+    if sprite_small is not None:
         img.paste(sprite_small, (x, y))
         
         # Label
@@ -2,34 +2,55 @@
 FastAPI REST API service for E-Ink Pet Clock
 Handles incoming messages and interactions from other devices
 """
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, ValidationError
+from typing import Any, Dict, List, Optional
+import json
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add parent directory to path to import core modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.config import Config
-from core.state import get_pet_state, get_message_log, get_stats
+from core.state import get_pet_state, get_message_log, get_stats, flush_all
+from core.flag_watcher import FLAG_DIR, signal_flag
+
+# orjson serializes responses much faster, FastAPI's JSONResponse without it
+try:
+    import orjson  # noqa: F401 (needed by ORJSONResponse)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
 
 
 # Pydantic models for request/response
-class MessageRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Request body: unknown keys are dropped, parsed values are read-only"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+
+class MessageRequest(RequestModel):
     from_device: str = "unknown"
     message: str
     type: str = "text"
 
 
-class FeedRequest(BaseModel):
+class FeedRequest(RequestModel):
     from_device: str = "unknown"
 
 
-class PokeRequest(BaseModel):
+class PokeRequest(RequestModel):
     from_device: str = "unknown"
 
 
+class BatchAction(RequestModel):
+    type: str  # message, feed or poke
+    payload: Dict[str, Any] = {}
+
+
 class StatusResponse(BaseModel):
     device_name: str
     pet_name: str
@@ -42,7 +63,64 @@ class StatusResponse(BaseModel):
 
 
 # Create FastAPI app
-app = FastAPI(title="E-Ink Pet Clock API")
+app = FastAPI(title="E-Ink Pet Clock API", default_response_class=DefaultResponse)
+
+
+@app.on_event("startup")
+def create_flag_dir():
+    """Create the flag directory once instead of on every request"""
+    FLAG_DIR.mkdir(parents=True, exist_ok=True)
+
+
+# Serialized /api/status, reused for STATUS_CACHE_TTL seconds unless a
+# request changes the state first
+STATUS_CACHE_TTL = 1.0
+_status_cache = {"body": b"", "expires": 0.0}
+
+
+# Saving and signalling the display happen once per burst of requests,
+# PUBLISH_DELAY seconds after the first one (one e-ink refresh per burst)
+PUBLISH_DELAY = 0.05
+_pending_flags = set()
+_publish_timer = None
+_publish_lock = threading.Lock()
+
+# Handlers doing file I/O are plain functions, run by FastAPI in its thread
+# pool; this lock is held while they change state and while it is saved
+_state_lock = threading.Lock()
+
+
+def publish_changes(*flag_names: str):
+    """Schedule saving what a request changed and telling the display about it"""
+    global _publish_timer
+    _status_cache["expires"] = 0.0
+    
+    with _publish_lock:
+        _pending_flags.update(flag_names)
+        if _publish_timer is None:
+            _publish_timer = threading.Timer(PUBLISH_DELAY, _publish_pending)
+            _publish_timer.daemon = True
+            _publish_timer.start()
+
+
+def _publish_pending():
+    """Timer thread: save once, then signal every flag collected since the timer started"""
+    global _publish_timer
+    with _publish_lock:
+        flag_names = tuple(_pending_flags)
+        _pending_flags.clear()
+        _publish_timer = None
+    
+    try:
+        # Save before the display is told to look
+        with _state_lock:
+            flush_all(force=True)
+        
+        for flag_name in flag_names:
+            # Wake the display service (a separate process)
+            signal_flag(flag_name)
+    except Exception as e:
+        print(f"Error publishing changes: {e}")
 
 
 @app.get("/")
@@ -56,84 +134,120 @@ async def root():
 
 
 @app.get("/api/status", response_model=StatusResponse)
-async def get_status():
+def get_status():
     """Get current device status"""
-    pet = get_pet_state()
+    now = time.monotonic()
+    if now >= _status_cache["expires"]:
+        pet = get_pet_state()
+        
+        # Built from our own state, so skip validation
+        _status_cache["body"] = StatusResponse.model_construct(
+            device_name=Config.DEVICE_NAME,
+            pet_name=pet.get("name", "Bunny"),
+            pet_mood=pet.get_mood(),
+            hunger=pet.hunger,
+            happiness=pet.happiness,
+            health=pet.health,
+            messages_count=get_message_log().count()
+        ).model_dump_json().encode()
+        _status_cache["expires"] = now + STATUS_CACHE_TTL
+    
+    return Response(content=_status_cache["body"], media_type="application/json")
+
+
+def apply_message(request: MessageRequest) -> str:
+    """Store a received message, returns the flag file to signal"""
     msg_log = get_message_log()
+    pet = get_pet_state()
+    stats = get_stats()
+    
+    # Add message to log
+    msg_log.add_message(
+        from_device=request.from_device,
+        message=request.message,
+        msg_type=request.type
+    )
+    
+    # Update stats
+    pet.message_received()
+    stats.increment("total_messages_received")
+    
+    # Special handling for pokes
+    if request.type == "poke":
+        pet.interact()
+    
+    return "new_message.flag"
+
+
+def apply_feed(request: FeedRequest) -> str:
+    """Feed the pet for a remote device, returns the flag file to signal"""
+    # Feed the pet
+    get_pet_state().feed()
+    
+    # Add notification message
+    get_message_log().add_message(
+        from_device=request.from_device,
+        message="Fed your bunny! 🍔",
+        msg_type="feed"
+    )
+    return "feed_pet.flag"
+
+
+def apply_poke(request: PokeRequest) -> str:
+    """Interact with the pet for a remote device, returns the flag file to signal"""
+    # Interact with pet
+    get_pet_state().interact()
     
-    return StatusResponse(
-        device_name=Config.DEVICE_NAME,
-        pet_name=pet.get("name", "Bunny"),
-        pet_mood=pet.get_mood(),
-        hunger=pet.hunger,
-        happiness=pet.happiness,
-        health=pet.health,
-        messages_count=len(msg_log.get_messages())
+    # Add notification
+    get_message_log().add_message(
+        from_device=request.from_device,
+        message="Poked you! 👋",
+        msg_type="poke"
     )
+    return "poke.flag"
+
+
+# Action types accepted by /api/batch: request model and handler
+BATCH_ACTIONS = {
+    "message": (MessageRequest, apply_message),
+    "feed": (FeedRequest, apply_feed),
+    "poke": (PokeRequest, apply_poke),
+}
 
 
 @app.post("/api/message")
-async def receive_message(request: MessageRequest):
+def receive_message(request: MessageRequest):
     """Receive a message from remote device"""
     try:
-        msg_log = get_message_log()
-        pet = get_pet_state()
-        stats = get_stats()
+        with _state_lock:
+            flag_name = apply_message(request)
         
-        # Add message to log
-        msg_log.add_message(
-            from_device=request.from_device,
-            message=request.message,
-            msg_type=request.type
-        )
-        
-        # Update stats
-        pet.message_received()
-        stats.increment("total_messages_received")
-        
-        # Special handling for pokes
-        if request.type == "poke":
-            pet.interact()
-        
-        # Set flag for display to pick up (optional)
-        flag_file = Path("/tmp/eink_flags/new_message.flag")
-        flag_file.parent.mkdir(exist_ok=True)
-        flag_file.touch()
+        publish_changes(flag_name)
         
         return {
             "status": "success",
             "message": "Message received",
-            "unread_count": msg_log.get_unread_count()
+            "unread_count": get_message_log().get_unread_count()
         }
     
     except Exception as e:
         stats = get_stats()
-        stats.record_error(f"Error receiving message: {str(e)}")
+        with _state_lock:
+            stats.record_error(f"Error receiving message: {str(e)}")
+            stats.flush(force=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/feed")
-async def receive_feed(request: FeedRequest):
+def receive_feed(request: FeedRequest):
     """Receive a feed action from remote device"""
     try:
-        pet = get_pet_state()
-        msg_log = get_message_log()
-        
-        # Feed the pet
-        pet.feed()
+        with _state_lock:
+            flag_name = apply_feed(request)
         
-        # Add notification message
-        msg_log.add_message(
-            from_device=request.from_device,
-            message="Fed your bunny! 🍔",
-            msg_type="feed"
-        )
-        
-        # Set flag
-        flag_file = Path("/tmp/eink_flags/feed_pet.flag")
-        flag_file.parent.mkdir(exist_ok=True)
-        flag_file.touch()
+        publish_changes(flag_name)
         
+        pet = get_pet_state()
         return {
             "status": "success",
             "message": "Pet fed",
@@ -143,48 +257,81 @@ async def receive_feed(request: FeedRequest):
     
     except Exception as e:
         stats = get_stats()
-        stats.record_error(f"Error handling feed: {str(e)}")
+        with _state_lock:
+            stats.record_error(f"Error handling feed: {str(e)}")
+            stats.flush(force=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/poke")
-async def receive_poke(request: PokeRequest):
+def receive_poke(request: PokeRequest):
     """Receive a poke/interaction from remote device"""
     try:
-        pet = get_pet_state()
-        msg_log = get_message_log()
+        with _state_lock:
+            flag_name = apply_poke(request)
         
-        # Interact with pet
-        pet.interact()
+        publish_changes(flag_name)
         
-        # Add notification
-        msg_log.add_message(
-            from_device=request.from_device,
-            message="Poked you! 👋",
-            msg_type="poke"
-        )
+        return {
+            "status": "success",
+            "message": "Poke received",
+            "happiness": get_pet_state().happiness
+        }
+    
+    except Exception as e:
+        stats = get_stats()
+        with _state_lock:
+            stats.record_error(f"Error handling poke: {str(e)}")
+            stats.flush(force=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/batch")
+def receive_batch(actions: List[BatchAction]):
+    """Receive several actions at once, all validated before any is applied"""
+    parsed = []
+    for index, action in enumerate(actions):
+        if action.type not in BATCH_ACTIONS:
+            raise HTTPException(status_code=400, detail=f"unknown action type: {action.type}")
+        model, handler = BATCH_ACTIONS[action.type]
+        try:
+            parsed.append((handler, model.model_validate(action.payload)))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"action {index}: {e}")
+    
+    flag_names = set()
+    try:
+        with _state_lock:
+            for handler, request in parsed:
+                flag_names.add(handler(request))
         
-        # Set flag
-        flag_file = Path("/tmp/eink_flags/poke.flag")
-        flag_file.parent.mkdir(exist_ok=True)
-        flag_file.touch()
+        publish_changes(*flag_names)
         
         return {
             "status": "success",
-            "message": "Poke received",
-            "happiness": pet.happiness
+            "message": f"{len(actions)} actions received",
+            "unread_count": get_message_log().get_unread_count()
         }
     
     except Exception as e:
         stats = get_stats()
-        stats.record_error(f"Error handling poke: {str(e)}")
+        with _state_lock:
+            stats.record_error(f"Error handling batch: {str(e)}")
+            stats.flush(force=True)
+        
+        # Save and show the actions applied before the failure
+        publish_changes(*flag_names)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# The health response never changes, serialized once
+_HEALTH_BODY = json.dumps({"status": "healthy", "device": Config.DEVICE_NAME}).encode()
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "device": Config.DEVICE_NAME}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
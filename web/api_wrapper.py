@@ -2,15 +2,14 @@
 """
 API Server Wrapper - automatically uses FastAPI or simple HTTP server
 """
+import importlib.util
 import sys
 
-# Try to use FastAPI first
-try:
-    import fastapi
-    import uvicorn
+# Try to use FastAPI first (find_spec only checks, importing happens below)
+if importlib.util.find_spec("fastapi") and importlib.util.find_spec("uvicorn"):
     HAS_FASTAPI = True
     print("Using FastAPI")
-except ImportError:
+else:
     HAS_FASTAPI = False
     print("FastAPI not available, using simple HTTP server")
 
@@ -19,40 +18,75 @@ if HAS_FASTAPI:
     from web.api import app
     
     if __name__ == "__main__":
+        import uvicorn
         uvicorn.run(app, host="0.0.0.0", port=5000)
 else:
     # Use simple HTTP server
-    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
     import json
+    import threading
     from pathlib import Path
     import sys
     sys.path.insert(0, str(Path(__file__).parent.parent))
     
+    # orjson if installed (returns bytes already), else stdlib json
+    try:
+        from orjson import dumps as json_dumps, loads as json_loads
+    except ImportError:
+        def json_dumps(data):
+            return json.dumps(data).encode()
+        json_loads = json.loads
+    
     from core.config import Config
     from core.state import get_pet_state, get_message_log
+    from core.flag_watcher import FLAG_DIR, signal_flag
+    
+    # Requests are handled in parallel threads, state changes one at a time
+    _state_lock = threading.Lock()
+    
+    # Largest request body accepted, bigger ones get 413 without being read
+    MAX_BODY = 64 * 1024
     
     class SimpleAPIHandler(BaseHTTPRequestHandler):
         """Simple HTTP handler for basic API functionality"""
         
+        # Keep-alive, so repeated status polls reuse the connection
+        protocol_version = "HTTP/1.1"
+        
         def log_message(self, format, *args):
             """Custom log format"""
             sys.stderr.write(f"[API] {format%args}\n")
         
         def send_json(self, code, data):
             """Send JSON response"""
+            body = json_dumps(data)
             self.send_response(code)
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if self.close_connection:
+                self.send_header('Connection', 'close')
             self.end_headers()
-            self.wfile.write(json.dumps(data).encode())
+            self.wfile.write(body)
         
         def do_POST(self):
             """Handle POST requests"""
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8') if content_length > 0 else '{}'
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                content_length = -1
+            if not 0 <= content_length <= MAX_BODY:
+                # The unread body would be parsed as the next request
+                self.close_connection = True
+                if content_length < 0:
+                    self.send_json(400, {'error': 'invalid Content-Length'})
+                else:
+                    self.send_json(413, {'error': 'request body too large'})
+                return
+            body = self.rfile.read(content_length) if content_length > 0 else b''
             
             try:
                 if self.path == '/api/message':
-                    data = json.loads(body) if body != '{}' else {}
+                    data = json_loads(body) if body else {}
                     message_text = data.get('message', data.get('text', ''))
                     from_device = data.get('from_device', data.get('from', 'unknown'))
                     
@@ -62,10 +96,11 @@ else:
                     
                     # Write to message log
                     message_log = get_message_log()
-                    message_log.add_message(message_text, from_device)
+                    with _state_lock:
+                        message_log.add_message(message_text, from_device)
                     
                     # Set flag for display manager
-                    Path('/tmp/eink_flags/new_message').write_text(json.dumps({
+                    (FLAG_DIR / 'new_message').write_bytes(json_dumps({
                         'text': message_text,
                         'from': from_device
                     }))
@@ -74,16 +109,18 @@ else:
                 
                 elif self.path == '/api/poke':
                     # Set poke flag
-                    Path('/tmp/eink_flags/poke').touch()
+                    signal_flag('poke')
                     self.send_json(200, {'status': 'ok', 'action': 'poked'})
                 
                 elif self.path == '/api/feed':
                     # Set feed flag
-                    Path('/tmp/eink_flags/feed').touch()
+                    signal_flag('feed')
                     
                     # Update pet state
                     pet = get_pet_state()
-                    pet.feed()
+                    with _state_lock:
+                        pet.feed()
+                        pet.flush(force=True)
                     
                     self.send_json(200, {'status': 'ok', 'action': 'fed'})
                 
@@ -123,9 +160,10 @@ else:
     
     if __name__ == "__main__":
         # Ensure flag directory exists
-        Path('/tmp/eink_flags').mkdir(parents=True, exist_ok=True)
+        FLAG_DIR.mkdir(parents=True, exist_ok=True)
         
-        server = HTTPServer(('0.0.0.0', 5000), SimpleAPIHandler)
+        # One thread per request (daemon threads, so shutdown does not wait)
+        server = ThreadingHTTPServer(('0.0.0.0', 5000), SimpleAPIHandler)
         print("Simple HTTP API server running on http://0.0.0.0:5000")
         print("Endpoints:")
         print("  GET  /api/status - Get device status")
@@ -1,69 +1,188 @@
 """
 Network client for sending messages to remote device
 """
-import httpx
+import atexit
+import threading
 from typing import Optional, Dict, Any
 from core.config import Config
 
+# One client for every request, so its keep-alive connection to the remote
+# device is reused instead of connecting again for each message. Created on
+# first use: importing httpx takes a while on the Pi
+_client = None
+_client_lock = threading.Lock()
 
-def send_message(message: str, msg_type: str = "text") -> bool:
+
+def _get_client():
+    """Get the shared httpx client, creating it on the first call"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            _client = httpx.Client(
+                base_url=Config.get_remote_url(),
+                timeout=5.0,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=30.0),
+            )
+        return _client
+
+# Actions sent within BATCH_WINDOW seconds of the first one go out together
+BATCH_WINDOW = 0.1
+BATCH_MAX_ACTIONS = 20
+
+# Single-action endpoints, for remote devices without /api/batch
+_ACTION_PATHS = {"message": "/api/message", "feed": "/api/feed", "poke": "/api/poke"}
+
+
+class _Batch:
+    """Actions that go out in one request, and the outcome once sent"""
+    __slots__ = ("actions", "sent", "ok")
+    
+    def __init__(self):
+        self.actions = []
+        self.sent = threading.Event()
+        self.ok = False
+
+
+class ActionBatcher:
+    """Collects outgoing actions and posts them to the remote /api/batch in one request"""
+    
+    def __init__(self, window: float = BATCH_WINDOW, max_actions: int = BATCH_MAX_ACTIONS):
+        self.window = window
+        self.max_actions = max_actions
+        self._batch = _Batch()
+        self._lock = threading.Lock()
+        self._timer = None
+        self._batch_supported = True  # Cleared once the remote answers 404
+    
+    def add(self, action_type: str, payload: Dict[str, Any]) -> _Batch:
+        """Queue an action, sent when the window closes or the batch is full"""
+        with self._lock:
+            batch = self._batch
+            batch.actions.append({"type": action_type, "payload": payload})
+            full = len(batch.actions) >= self.max_actions
+            if full:
+                self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self._send(batch)
+        return batch
+    
+    def send(self, action_type: str, payload: Dict[str, Any]) -> bool:
+        """Queue an action and wait for the request carrying it, True if accepted"""
+        batch = self.add(action_type, payload)
+        batch.sent.wait()
+        return batch.ok
+    
+    def flush(self) -> bool:
+        """Send the queued actions now, returns True if all were accepted"""
+        with self._lock:
+            batch = self._take_batch()
+        return self._send(batch)
+    
+    def _take_batch(self) -> _Batch:
+        """Start a new batch and return the current one (call with the lock held)"""
+        batch, self._batch = self._batch, _Batch()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+    
+    def _send(self, batch: _Batch) -> bool:
+        """Post a batch and wake everyone waiting for it"""
+        actions = batch.actions
+        try:
+            batch.ok = not actions or self._post(actions)
+        except Exception as e:
+            print(f"Error sending {len(actions)} actions: {e}")
+            batch.ok = False
+        batch.sent.set()
+        return batch.ok
+    
+    def _post(self, actions) -> bool:
+        client = _get_client()
+        if self._batch_supported:
+            response = client.post("/api/batch", json=actions)
+            if response.status_code != 404:
+                return response.status_code == 200
+            # Older remote API: one request per action from now on
+            self._batch_supported = False
+        
+        return all([
+            client.post(_ACTION_PATHS[action["type"]], json=action["payload"]).status_code == 200
+            for action in actions
+        ])
+
+
+_batcher = ActionBatcher()
+
+
+@atexit.register
+def _shutdown():
+    """Send queued actions, then close the client"""
+    _batcher.flush()
+    if _client is not None:
+        _client.close()
+
+
+def flush_actions() -> bool:
+    """Send queued actions now instead of waiting for the batch window"""
+    return _batcher.flush()
+
+
+def send_message(message: str, msg_type: str = "text", wait: bool = True) -> bool:
     """
-    Send a text message to the remote device
+    Send a text message to the remote device (see ActionBatcher)
     
     Args:
         message: The message text
         msg_type: Type of message (text, poke, feed, etc.)
+        wait: Wait for the batch carrying it to be sent and report
+            delivery; False only queues it
     
     Returns:
-        True if successful, False otherwise
+        True if delivered (or queued, when not waiting), False otherwise
     """
-    try:
-        url = Config.get_remote_url("/api/message")
-        data = {
-            "from": Config.DEVICE_NAME,
-            "message": message,
-            "type": msg_type
-        }
-        
-        with httpx.Client(timeout=5.0) as client:
-            response = client.post(url, json=data)
-            return response.status_code == 200
+    data = {
+        "from": Config.DEVICE_NAME,
+        "message": message,
+        "type": msg_type
+    }
     
-    except Exception as e:
-        print(f"Error sending message: {e}")
-        return False
+    if wait:
+        return _batcher.send("message", data)
+    _batcher.add("message", data)
+    return True
 
 
-def send_poke() -> bool:
+def send_poke(wait: bool = True) -> bool:
     """
     Send a poke/interaction to the remote device
     
     Returns:
-        True if successful, False otherwise
+        True if delivered (or queued, when not waiting), False otherwise
     """
-    return send_message("Poke!", "poke")
+    return send_message("Poke!", "poke", wait)
 
 
-def send_feed() -> bool:
+def send_feed(wait: bool = True) -> bool:
     """
     Send a feed action to the remote device (feed their pet)
     
     Returns:
-        True if successful, False otherwise
+        True if delivered (or queued, when not waiting), False otherwise
     """
-    try:
-        url = Config.get_remote_url("/api/feed")
-        data = {
-            "from": Config.DEVICE_NAME
-        }
-        
-        with httpx.Client(timeout=5.0) as client:
-            response = client.post(url, json=data)
-            return response.status_code == 200
+    data = {
+        "from": Config.DEVICE_NAME
+    }
     
-    except Exception as e:
-        print(f"Error sending feed: {e}")
-        return False
+    if wait:
+        return _batcher.send("feed", data)
+    _batcher.add("feed", data)
+    return True
 
 
 def get_remote_status() -> Optional[Dict[str, Any]]:
@@ -74,13 +193,10 @@ def get_remote_status() -> Optional[Dict[str, Any]]:
         Status dictionary if successful, None otherwise
     """
     try:
-        url = Config.get_remote_url("/api/status")
-        
-        with httpx.Client(timeout=5.0) as client:
-            response = client.get(url)
-            if response.status_code == 200:
-                return response.json()
-            return None
+        response = _get_client().get("/api/status")
+        if response.status_code == 200:
+            return response.json()
+        return None
     
     except Exception as e:
         print(f"Error getting remote status: {e}")
@@ -94,17 +210,24 @@ if __name__ == "__main__":
     
     # Test message
     print("\nSending test message...")
-    if send_message("Hello from test!", "text"):
-        print("✓ Message sent successfully")
+    if send_message("Hello from test!", "text", wait=False):
+        print("✓ Message queued")
     else:
-        print("✗ Failed to send message")
+        print("✗ Failed to queue message")
     
     # Test poke
     print("\nSending poke...")
-    if send_poke():
-        print("✓ Poke sent successfully")
+    if send_poke(wait=False):
+        print("✓ Poke queued")
+    else:
+        print("✗ Failed to queue poke")
+    
+    # Send both now rather than at the end of the batch window
+    print("\nFlushing queued actions...")
+    if flush_actions():
+        print("✓ Actions delivered")
     else:
-        print("✗ Failed to send poke")
+        print("✗ Failed to deliver actions")
     
     # Test status
     print("\nGetting remote status...")